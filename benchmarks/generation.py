@@ -0,0 +1,199 @@
+"""
+Benchmarks scramble generation throughput, latency and peak memory.
+
+Every puzzle in config.yaml's puzzle_type_list is run at its default move count
+(from puzzle_default_moves, extrapolated for larger cubes) in single, batch,
+streaming and parallel mode.
+
+Usage: python benchmarks/generation.py --output results.json [--baseline old.json]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from importlib import metadata
+from itertools import islice
+
+from scramble_generator.puzzle_registry import registry
+from scramble_generator.scramble_generator import ScrambleGenerator
+from scramble_generator.yaml_file_handler import YamlFileHandler
+
+MODES = ("single", "batch", "streaming", "parallel")
+BATCH_SIZE = 100
+
+
+def time_single(generator, num_moves, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        generator.generate_scramble(num_moves=num_moves)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def time_batch(generator, num_moves, count):
+    latencies = []
+    for start_index in range(0, count, BATCH_SIZE):
+        batch_size = min(BATCH_SIZE, count - start_index)
+        start = time.perf_counter()
+        generator.generate_scrambles(num_moves=num_moves, count=batch_size)
+        latencies.extend([(time.perf_counter() - start) / batch_size] * batch_size)
+    return latencies
+
+
+def time_streaming(generator, num_moves, count):
+    latencies = []
+    scrambles = generator.iter_scrambles(num_moves=num_moves, limit=count)
+    while True:
+        start = time.perf_counter()
+        if next(scrambles, None) is None:
+            break
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def time_parallel(generator, num_moves, count, workers=None):
+    latencies = []
+    chunks = generator.iter_scramble_chunks(
+        num_moves=num_moves, count=count, workers=workers
+    )
+    while True:
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        latencies.extend([(time.perf_counter() - start) / len(chunk)] * len(chunk))
+    return latencies
+
+
+TIMERS = {
+    "single": time_single,
+    "batch": time_batch,
+    "streaming": time_streaming,
+    "parallel": time_parallel,
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def run_benchmark(puzzle_type, mode, num_moves, count, workers):
+    generator = ScrambleGenerator(puzzle_type)
+    timer = TIMERS[mode]
+    extra = {"workers": workers} if mode == "parallel" else {}
+
+    # * Warm up once so table building is not part of the measurement
+    list(islice(generator.iter_scrambles(num_moves=num_moves), 10))
+
+    start = time.perf_counter()
+    latencies = timer(generator, num_moves, count, **extra)
+    elapsed = time.perf_counter() - start
+
+    # * Memory is traced in a separate pass since tracemalloc slows everything down.
+    # * Parallel mode only sees the parent process.
+    tracemalloc.start()
+    timer(generator, num_moves, count, **extra)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "puzzle_type": puzzle_type,
+        "mode": mode,
+        "num_moves": num_moves,
+        "count": count,
+        "scrambles_per_sec": round(count / elapsed, 1),
+        "latency_us": {
+            "mean": round(statistics.fmean(latencies) * 1e6, 2),
+            "p50": round(percentile(latencies, 0.50) * 1e6, 2),
+            "p90": round(percentile(latencies, 0.90) * 1e6, 2),
+            "p99": round(percentile(latencies, 0.99) * 1e6, 2),
+            "max": round(max(latencies) * 1e6, 2),
+        },
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def get_version():
+    try:
+        return metadata.version("scramble_generator")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {
+            (result["puzzle_type"], result["mode"]): result
+            for result in json.load(f)["results"]
+        }
+
+    print(f"{'puzzle':<10} {'mode':<10} {'scrambles/s':>12} {'change':>8}")
+    for result in results:
+        old = baseline.get((result["puzzle_type"], result["mode"]))
+        change = (
+            f"{result['scrambles_per_sec'] / old['scrambles_per_sec'] - 1:+.1%}"
+            if old
+            else "new"
+        )
+        print(
+            f"{result['puzzle_type']:<10} {result['mode']:<10} "
+            f"{result['scrambles_per_sec']:>12} {change:>8}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=2000)
+    parser.add_argument("-m", "--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("-p", "--puzzles", nargs="+", help="defaults to every puzzle")
+    parser.add_argument("-w", "--workers", type=int, help="parallel mode workers")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    parser.add_argument("-b", "--baseline", help="JSON results to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = YamlFileHandler("resources/configs/config.yaml").load_yaml_file()
+    puzzles = args.puzzles or config["puzzle_type_list"]
+    results = []
+
+    for puzzle_type in puzzles:
+        num_moves = registry.get_default_num_moves(puzzle_type)
+        for mode in args.modes:
+            result = run_benchmark(
+                puzzle_type, mode, num_moves, args.count, args.workers
+            )
+            results.append(result)
+            print(
+                f"{puzzle_type:<10} {mode:<10} {result['scrambles_per_sec']:>12} "
+                f"scrambles/s  p99 {result['latency_us']['p99']:>9} us",
+                file=sys.stderr,
+            )
+
+    report = {
+        "version": get_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
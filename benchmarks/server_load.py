@@ -0,0 +1,147 @@
+"""
+Load tests a scramble server with concurrent keep-alive clients.
+
+Every client sends requests back to back over one HTTP or WebSocket connection
+and the request latencies are reported as JSON, like benchmarks/generation.py.
+With --spawn a local server is started first, so one machine is enough.
+
+Usage: python benchmarks/server_load.py --spawn --clients 16 --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from scramble_generator.server import DEFAULT_PORT, ScrambleClient
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def run_client(host, port, puzzle_type, batch, requests, websocket):
+    client = ScrambleClient(host, port)
+    await client.connect(websocket)
+    latencies = []
+
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            await client.get_scrambles(puzzle_type, batch)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        await client.close()
+
+    return latencies
+
+
+async def run_load(args):
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *[
+            run_client(
+                args.host,
+                args.port,
+                args.puzzle_type,
+                args.batch,
+                args.requests,
+                args.websocket,
+            )
+            for _ in range(args.clients)
+        ]
+    )
+    elapsed = time.perf_counter() - start
+    latencies = [latency for result in results for latency in result]
+
+    return {
+        "puzzle_type": args.puzzle_type,
+        "transport": "websocket" if args.websocket else "http",
+        "clients": args.clients,
+        "batch": args.batch,
+        "requests": len(latencies),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "scrambles_per_sec": round(len(latencies) * args.batch / elapsed, 1),
+        "latency_us": {
+            "mean": round(statistics.fmean(latencies) * 1e6, 2),
+            "p50": round(percentile(latencies, 0.50) * 1e6, 2),
+            "p90": round(percentile(latencies, 0.90) * 1e6, 2),
+            "p99": round(percentile(latencies, 0.99) * 1e6, 2),
+            "max": round(max(latencies) * 1e6, 2),
+        },
+    }
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"No server on {host}:{port} after {timeout}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-p", "--puzzle-type", default="3x3")
+    parser.add_argument("-c", "--clients", type=int, default=8)
+    parser.add_argument("-r", "--requests", type=int, default=500, help="per client")
+    parser.add_argument(
+        "-b", "--batch", type=int, default=1, help="scrambles per request"
+    )
+    parser.add_argument("--websocket", action="store_true")
+    parser.add_argument(
+        "--spawn", action="store_true", help="start a local server first"
+    )
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = None
+
+    if args.spawn:
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "scramble_generator.server",
+                "--host",
+                args.host,
+                "--port",
+                str(args.port),
+                "--puzzles",
+                args.puzzle_type,
+            ]
+        )
+
+    try:
+        wait_for_port(args.host, args.port)
+        # * Give the spawned server's pool a moment to fill before measuring
+        if server is not None:
+            time.sleep(1)
+        result = asyncio.run(run_load(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Measures cold import time of the package entry points and enforces a budget.
+
+Every target is imported in a fresh interpreter under -X importtime, several
+times over, and the median cumulative import time is compared to its budget.
+Each target also has modules it must not pull in at import (Qt, PyYAML or
+multiprocessing for the headless ones). With PySide6 installed, the time from
+process start until the main window has been shown is measured as well.
+
+Usage: python benchmarks/startup.py [--budget core=40] [--output results.json]
+Exits with status 1 when any target is over budget or imports a banned module.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from importlib.util import find_spec
+
+# * Budgets are generous multiples of a typical laptop so CI noise does not fail them
+TARGETS = {
+    "core": {
+        "module": "scramble_generator.scramble_generator",
+        "budget_ms": 60,
+        "banned": ("PySide6", "yaml", "multiprocessing", "concurrent.futures"),
+    },
+    "cli": {
+        "module": "scramble_generator.cli",
+        "budget_ms": 80,
+        "banned": ("PySide6", "yaml", "multiprocessing"),
+    },
+    "app": {
+        "module": "scramble_generator.app",
+        "budget_ms": 400,
+        "banned": ("yaml",),
+        "requires": "PySide6",
+    },
+}
+GUI_BUDGET_MS = 1500
+GUI_SCRIPT = """
+import time
+start = time.perf_counter()
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+from scramble_generator.app import ScrambleGenerator
+app = QApplication([])
+window = ScrambleGenerator()
+QTimer.singleShot(0, app.quit)
+app.exec()
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def get_import_time_ms(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # * The target's own line is the one without indentation before its name
+    for line in reversed(result.stderr.splitlines()):
+        if line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.rstrip() == f" {module}":
+            return int(cumulative) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def get_banned_imports(module, banned):
+    script = (
+        f"import sys, {module}; "
+        f"print(','.join(name for name in {banned!r} if name in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+def get_gui_startup_ms():
+    result = subprocess.run(
+        [sys.executable, "-c", GUI_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "QT_QPA_PLATFORM": "offscreen"},
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def parse_budgets(values):
+    budgets = {}
+    for value in values:
+        name, _, budget = value.partition("=")
+        if name not in TARGETS and name != "gui":
+            raise SystemExit(f"Unknown target: {name}")
+        budgets[name] = float(budget)
+    return budgets
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="TARGET=MS",
+        help="override a budget, targets are core, cli, app and gui",
+    )
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    budgets = parse_budgets(args.budget)
+    results = []
+
+    for name, target in TARGETS.items():
+        if "requires" in target and find_spec(target["requires"]) is None:
+            print(f"{name:<6} skipped, {target['requires']} is not installed")
+            continue
+
+        times = [get_import_time_ms(target["module"]) for _ in range(args.repeat)]
+        budget = budgets.get(name, target["budget_ms"])
+        banned = get_banned_imports(target["module"], target["banned"])
+        results.append(
+            {
+                "target": name,
+                "module": target["module"],
+                "median_ms": round(statistics.median(times), 2),
+                "min_ms": round(min(times), 2),
+                "budget_ms": budget,
+                "banned_imports": banned,
+                "passed": statistics.median(times) <= budget and not banned,
+            }
+        )
+
+    if find_spec("PySide6") is not None:
+        times = [get_gui_startup_ms() for _ in range(args.repeat)]
+        budget = budgets.get("gui", GUI_BUDGET_MS)
+        results.append(
+            {
+                "target": "gui",
+                "module": "window shown",
+                "median_ms": round(statistics.median(times), 2),
+                "min_ms": round(min(times), 2),
+                "budget_ms": budget,
+                "banned_imports": [],
+                "passed": statistics.median(times) <= budget,
+            }
+        )
+
+    for result in results:
+        status = "ok" if result["passed"] else "OVER BUDGET"
+        if result["banned_imports"]:
+            status = "imports " + ", ".join(result["banned_imports"])
+        print(
+            f"{result['target']:<6} {result['median_ms']:>8} ms "
+            f"(budget {result['budget_ms']} ms)  {status}"
+        )
+
+    if args.output:
+        report = {
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if not all(result["passed"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measures how long the app takes to switch between its light and dark themes.
+
+The main window is created on the offscreen platform and its theme toggle is
+pressed repeatedly. Each switch is timed from the toggle until pending events,
+including the repaint, have been processed.
+
+Usage: python benchmarks/theme_switch.py [--switches 200] [--budget 20]
+Exits with status 1 when the median switch is over budget. Needs PySide6.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# * Must be set before Qt picks a platform plugin
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from scramble_generator.app import ScrambleGenerator  # noqa: E402
+
+BUDGET_MS = 20
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def measure_switches(app, window, switches):
+    times = []
+    for _ in range(switches):
+        start = time.perf_counter()
+        window.toggle_theme()
+        app.processEvents()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--switches", type=int, default=200)
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, metavar="MS")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    app = QApplication([])
+    window = ScrambleGenerator()
+    app.processEvents()
+
+    # * The first switches also build and cache both stylesheets, so skip them
+    measure_switches(app, window, 2)
+    times = measure_switches(app, window, args.switches)
+    median = statistics.median(times)
+
+    result = {
+        "platform": app.platformName(),
+        "switches": args.switches,
+        "switch_ms": {
+            "mean": round(statistics.fmean(times), 3),
+            "p50": round(median, 3),
+            "p90": round(percentile(times, 0.90), 3),
+            "max": round(max(times), 3),
+        },
+        "budget_ms": args.budget,
+        "passed": median <= args.budget,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+
+    if not result["passed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
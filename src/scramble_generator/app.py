@@ -3,8 +3,18 @@ Python app for generating scrambles for twisty puzzles.
 """
 
 import sys
-
-from PySide6.QtCore import Qt, QTimer, QTime
+from collections import deque
+from functools import cache
+
+from PySide6.QtCore import (
+    QElapsedTimer,
+    QObject,
+    QRunnable,
+    Qt,
+    QThreadPool,
+    QTimer,
+    Signal,
+)
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -16,14 +26,77 @@ from PySide6.QtWidgets import (
     QGridLayout,
 )
 
-from .scramble_generator import ScrambleGenerator as SG
+from .puzzle_registry import registry
+from .scramble_generator import get_generator
+from .solve_log import SolveLogError, open_session, reset_session
 from .yaml_file_handler import YamlFileHandler
 
-config_file = YamlFileHandler("resources/configs/config.yaml")
-config = config_file.load_yaml_file()
 
-themes_file = YamlFileHandler("resources/configs/themes.yaml")
-themes = themes_file.load_yaml_file()
+# * Configs are read on first use rather than at import
+@cache
+def get_config():
+    return YamlFileHandler("resources/configs/config.yaml").load_yaml_file()
+
+
+@cache
+def get_themes():
+    return YamlFileHandler("resources/configs/themes.yaml").load_yaml_file()
+
+
+@cache
+def get_stylesheets():
+    """
+    One application stylesheet per theme, built once so a switch is a lookup.
+
+    Widgets using the theme's widget background carry the "widget" property
+    instead of a stylesheet of their own, so a switch is a single repolish. Their
+    children (the spin box editor, the combo box popup) share that background.
+    """
+    themes = get_themes()
+    general = themes["general"]
+    stylesheets = {}
+
+    for name, theme in themes.items():
+        if name == "general":
+            continue
+        stylesheets[name] = f"""
+            QWidget {{
+                background-color: {theme["background-color"]};
+                color: {theme["color"]};
+                border: {theme["border"]};
+                border-radius: {general["border-radius"]};
+                padding: {general["padding"]};
+            }}
+            QWidget[widget="true"], QWidget[widget="true"] QWidget {{
+                background-color: {theme["widget-background-color"]};
+            }}
+            """
+
+    return stylesheets
+
+
+class ScrambleRefillSignals(QObject):
+    refilled = Signal(str, int, list)
+
+
+class ScrambleRefill(QRunnable):
+    """Generates scrambles for the queue off the UI thread."""
+
+    def __init__(self, puzzle_type, num_moves, count, signals):
+        super().__init__()
+        self.puzzle_type = puzzle_type
+        self.num_moves = num_moves
+        self.count = count
+        self.signals = signals
+
+    def run(self):
+        generator = get_generator(self.puzzle_type)
+        scrambles = generator.generate_scrambles(
+            num_moves=self.num_moves, count=self.count
+        )
+        self.signals.refilled.emit(
+            self.puzzle_type, self.num_moves, [str(scramble) for scramble in scrambles]
+        )
 
 
 class ScrambleGenerator(QMainWindow):
@@ -32,6 +105,7 @@ class ScrambleGenerator(QMainWindow):
         self.init_ui()
 
     def init_ui(self):
+        config = get_config()
         self.show()
 
         # * Set window default settings
@@ -42,9 +116,15 @@ class ScrambleGenerator(QMainWindow):
 
         # * Define normal variables
         self.is_running = False
-        self.elapsed_time = QTime(0, 0)
+        self.session = None
         self.puzzle_type_list = [puzzle for puzzle in config["puzzle_type_list"]]
 
+        # * Upcoming scrambles per (puzzle type, moves), refilled in the background
+        self.scramble_queues = {}
+        self.refilling = set()
+        self.refill_signals = ScrambleRefillSignals()
+        self.thread_pool = QThreadPool.globalInstance()
+
         # * Create end user widgets and apply settings to them
         self.scramble_button = QPushButton("Generate Scramble")
 
@@ -65,18 +145,26 @@ class ScrambleGenerator(QMainWindow):
         )
         self.scramble.setFixedWidth(config["scramble_widget_width"])
 
+        self.session_stats = QLabel(" ", alignment=Qt.AlignmentFlag.AlignCenter)
+        self.session_stats.setFixedWidth(config["scramble_widget_width"])
+
         self.timer_button = QPushButton("Start Timer")
 
         self.timer_output = QLabel(
-            "00:00.0", alignment=Qt.AlignmentFlag.AlignCenter, maximumHeight=22
+            format_time(0), alignment=Qt.AlignmentFlag.AlignCenter, maximumHeight=22
         )
 
+        # * The monotonic stopwatch measures, the QTimer only repaints the display
+        self.stopwatch = QElapsedTimer()
         self.timer = QTimer()
-        self.timer.interval = 10  # * Milliseconds
+        self.timer.setInterval(config["timer_refresh_interval"])
 
         # * Define button connections and/or actions
         self.scramble_button.pressed.connect(self.get_moves)
         self.puzzle_type.currentTextChanged.connect(self.set_default_num_moves)
+        self.puzzle_type.currentTextChanged.connect(self.prefetch_scrambles)
+        self.num_moves.valueChanged.connect(self.prefetch_scrambles)
+        self.refill_signals.refilled.connect(self.add_scrambles)
         self.theme_toggle.pressed.connect(self.toggle_theme)
         self.timer_button.pressed.connect(self.toggle_timer)
         self.timer.timeout.connect(self.update_time)
@@ -96,6 +184,7 @@ class ScrambleGenerator(QMainWindow):
         left_side.addWidget(self.theme_toggle, 4, 0, 1, 2)
 
         right_side.addWidget(self.scramble, 0, 0, 1, 2)
+        right_side.addWidget(self.session_stats, 1, 0, 1, 2)
 
         # * Setup overall page layout and set default window theme
         page.addLayout(left_side, 0, 0)
@@ -106,8 +195,42 @@ class ScrambleGenerator(QMainWindow):
 
         self.setCentralWidget(gui)
 
+        # * Themed through the application stylesheet, matched on this property
+        for widget in (
+            self.scramble_button,
+            self.puzzle_type,
+            self.num_moves,
+            self.theme_toggle,
+            self.scramble,
+            self.timer_button,
+            self.timer_output,
+            self.session_stats,
+        ):
+            widget.setProperty("widget", True)
+
         self.apply_theme(self.theme_toggle.text().lower())
 
+        # * Everything the first paint does not need waits until the window is up
+        QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        try:
+            self.session = open_session()
+            self.session_stats.setText(self.format_stats())
+        except SolveLogError:
+            self.recover_session()
+        self.prefetch_scrambles()
+
+    def recover_session(self):
+        try:
+            self.session = reset_session()
+        except (OSError, SolveLogError):
+            # * The timer still works without a log, solves just are not saved
+            self.session = None
+            self.session_stats.setText("Solve log unreadable, solves are not saved")
+            return
+        self.session_stats.setText("Damaged solve log set aside, new session started")
+
     def toggle_theme(self):
         if self.theme_toggle.text() == "Dark":
             self.theme_toggle.setText("Light")
@@ -119,24 +242,7 @@ class ScrambleGenerator(QMainWindow):
         self.apply_theme(theme.lower())
 
     def apply_theme(self, theme):
-        self.main_stylesheet = f"""
-            background-color: {themes[theme]["background-color"]};
-            color: {themes[theme]["color"]};
-            border: {themes[theme]["border"]};
-            border-radius: {themes["general"]["border-radius"]};
-            padding: {themes["general"]["padding"]};
-            """
-        self.widget_stylesheet = f"""
-            background-color: {themes[theme]["widget-background-color"]};
-            """
-        self.setStyleSheet(self.main_stylesheet)
-        self.scramble_button.setStyleSheet(self.widget_stylesheet)
-        self.puzzle_type.setStyleSheet(self.widget_stylesheet)
-        self.num_moves.setStyleSheet(self.widget_stylesheet)
-        self.theme_toggle.setStyleSheet(self.widget_stylesheet)
-        self.scramble.setStyleSheet(self.widget_stylesheet)
-        self.timer_button.setStyleSheet(self.widget_stylesheet)
-        self.timer_output.setStyleSheet(self.widget_stylesheet)
+        QApplication.instance().setStyleSheet(get_stylesheets()[theme])
 
         (
             self.theme_toggle.setText("Dark")
@@ -145,37 +251,78 @@ class ScrambleGenerator(QMainWindow):
         )
 
     def get_moves(self):
-        scramble = SG()
-        self.scramble.setText(
-            scramble.generate_scramble(
-                self.puzzle_type.currentText().lower(), self.num_moves.value()
+        queue = self.scramble_queues.get(self.get_queue_key())
+
+        if queue:
+            self.scramble.setText(queue.popleft())
+        else:
+            # * Only before the first refill lands, generate this one directly
+            generator = get_generator(self.puzzle_type.currentText())
+            self.scramble.setText(
+                generator.generate_scramble(num_moves=self.num_moves.value())
             )
-        )
+
+        self.prefetch_scrambles()
+
+    def get_queue_key(self):
+        return self.puzzle_type.currentText(), self.num_moves.value()
+
+    def prefetch_scrambles(self):
+        key = self.get_queue_key()
+        queue = self.scramble_queues.setdefault(key, deque())
+        missing = get_config()["scramble_queue_size"] - len(queue)
+
+        if missing > 0 and key not in self.refilling:
+            self.refilling.add(key)
+            self.thread_pool.start(ScrambleRefill(*key, missing, self.refill_signals))
+
+    def add_scrambles(self, puzzle_type, num_moves, scrambles):
+        key = puzzle_type, num_moves
+        self.refilling.discard(key)
+        self.scramble_queues[key].extend(scrambles)
 
     def set_default_num_moves(self):
         self.num_moves.setValue(
-            config["puzzle_default_moves"][self.puzzle_type.currentText().lower()]
+            registry.get_default_num_moves(self.puzzle_type.currentText())
         )
 
     def toggle_timer(self):
         if not self.is_running:
-            self.timer.start(100)  # * Update display every 100 milliseconds
+            self.stopwatch.start()
+            self.timer.start()
             self.timer_button.setText("Stop Timer")
             self.is_running = True
         else:
+            # * Read the clock before touching any widgets so nothing delays the stop
+            elapsed = self.stopwatch.elapsed()
             self.timer.stop()
             self.timer_button.setText("Start Timer")
             self.is_running = False
-            self.update_time()
+            self.timer_output.setText(format_time(elapsed))
+            if self.session is not None:
+                self.session.add_solve(
+                    elapsed,
+                    self.puzzle_type.currentText(),
+                    self.scramble.text().strip(),
+                )
+                self.session_stats.setText(self.format_stats())
 
     def update_time(self):
-        self.elapsed_time = self.elapsed_time.addMSecs(
-            100
-        )  # * Increment time by 100 milliseconds
-        self.timer_output.setText(self.elapsed_time.toString("mm:ss.z"))
+        self.timer_output.setText(format_time(self.stopwatch.elapsed()))
 
-        if not self.is_running:
-            self.elapsed_time = QTime(0, 0)
+    def format_stats(self):
+        stats = self.session.get_stats()
+        parts = []
+        for name in ("best", "mean", "ao5", "ao12", "ao100"):
+            value = "-" if stats[name] is None else format_time(round(stats[name]))
+            parts.append(f"{name} {value}")
+        return "   ".join(parts)
+
+
+def format_time(milliseconds):
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{minutes:02}:{seconds:02}.{milliseconds:03}"
 
 
 def main():
@@ -0,0 +1,213 @@
+"""
+Headless command line interface for exporting scrambles without starting Qt.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from itertools import chain
+
+from .puzzle_registry import registry
+from .random_sources import SeededRandomSource
+from .random_state import SOLVERS
+from .scramble_generator import ScrambleGenerator, get_generator
+from .scramble_index import (
+    KEY_MODES,
+    BloomIndex,
+    ExactIndex,
+    ScrambleIndexError,
+    load_index,
+)
+from .scramble_quality import ScrambleQualityError
+
+OUTPUT_FORMATS = ("text", "jsonl", "csv")
+
+
+def non_negative_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"expected a whole number >= 0, got {value!r}")
+    return number
+
+
+def quality(value):
+    try:
+        number = float(value)
+    except ValueError:
+        number = -1.0
+    if not 0 <= number <= 1:
+        raise argparse.ArgumentTypeError(
+            f"expected a number from 0 to 1, got {value!r}"
+        )
+    return number
+
+
+def write_scrambles(scrambles, output_format, output):
+    if output_format == "csv":
+        writer = csv.writer(output)
+        writer.writerow(["index", "puzzle_type", "scramble"])
+
+    for index, scramble in enumerate(scrambles, start=1):
+        if output_format == "text":
+            output.write(f"{scramble}\n")
+        elif output_format == "jsonl":
+            record = {
+                "index": index,
+                "puzzle_type": scramble.puzzle_type,
+                "scramble": str(scramble),
+            }
+            output.write(json.dumps(record) + "\n")
+        else:
+            writer.writerow([index, scramble.puzzle_type, str(scramble)])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="scramble-generator-cli",
+        description="Generate scrambles for twisty puzzles without the GUI.",
+    )
+    parser.add_argument("-p", "--puzzle-type", default="3x3")
+    parser.add_argument(
+        "-m",
+        "--num-moves",
+        type=non_negative_int,
+        help="moves per scramble (defaults to the puzzle's default from config.yaml)",
+    )
+    parser.add_argument("-n", "--count", type=non_negative_int, default=1)
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=non_negative_int,
+        default=1,
+        help="worker processes to generate with (0 uses every core)",
+    )
+    parser.add_argument(
+        "-s",
+        "--seed",
+        help="seed for a reproducible (non-cryptographic) scramble set",
+    )
+    parser.add_argument(
+        "-c",
+        "--canonical",
+        action="store_true",
+        help="skip redundant sequences like U U2, R R' and U D U",
+    )
+    parser.add_argument(
+        "-r",
+        "--random-state",
+        action="store_true",
+        help="random-state scrambles (2x2 and 3x3 only, ignores --num-moves)",
+    )
+    parser.add_argument(
+        "-q",
+        "--min-quality",
+        type=quality,
+        help="regenerate scrambles that leave more than 1 - MIN_QUALITY of the "
+        "stickers solved (0.5 is a sensible floor)",
+    )
+    parser.add_argument(
+        "-i",
+        "--index",
+        help="dedup index file, every scramble is checked against and added to it",
+    )
+    parser.add_argument(
+        "--bloom",
+        type=int,
+        metavar="CAPACITY",
+        help="create the index as a Bloom filter sized for CAPACITY scrambles",
+    )
+    parser.add_argument(
+        "--index-key",
+        choices=KEY_MODES,
+        default="moves",
+        help="treat scrambles as repeats by identical moves or identical end state",
+    )
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="text")
+    parser.add_argument("-o", "--output", help="file to write to (defaults to stdout)")
+    return parser.parse_args(argv)
+
+
+def get_index(args):
+    if args.index is None:
+        return None
+    if os.path.exists(args.index):
+        return load_index(args.index)
+    if args.bloom:
+        return BloomIndex(args.bloom, key=args.index_key)
+    return ExactIndex(args.index_key)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    try:
+        dedup_index = get_index(args)
+        if args.seed is None and dedup_index is None:
+            generator = get_generator(
+                args.puzzle_type, args.canonical, args.min_quality
+            )
+        else:
+            random_source = (
+                SeededRandomSource(args.seed) if args.seed is not None else None
+            )
+            generator = ScrambleGenerator(
+                args.puzzle_type,
+                random_source,
+                args.canonical,
+                args.min_quality,
+                dedup_index,
+            )
+    except (ValueError, ScrambleIndexError) as error:
+        sys.exit(f"scramble-generator-cli: {error}")
+
+    if args.random_state and generator.puzzle_type not in SOLVERS:
+        sys.exit(
+            "scramble-generator-cli: random-state scrambles are only available for "
+            + ", ".join(SOLVERS)
+        )
+
+    num_moves = args.num_moves
+    if num_moves is None:
+        num_moves = registry.get_default_num_moves(args.puzzle_type)
+    if args.random_state:
+        scrambles = (
+            generator.generate_random_state_scrambles()[0] for _ in range(args.count)
+        )
+    elif args.workers == 1:
+        scrambles = generator.iter_scrambles(num_moves=num_moves, limit=args.count)
+    else:
+        scrambles = chain.from_iterable(
+            generator.iter_scramble_chunks(
+                num_moves=num_moves, count=args.count, workers=args.workers or None
+            )
+        )
+
+    try:
+        if args.output:
+            with open(args.output, "w", newline="") as f:
+                write_scrambles(scrambles, args.format, f)
+        else:
+            write_scrambles(scrambles, args.format, sys.stdout)
+    except (ScrambleIndexError, ScrambleQualityError) as error:
+        sys.exit(f"scramble-generator-cli: {error}")
+    finally:
+        # * Saved even on failure, anything already written has been issued
+        if dedup_index is not None:
+            dedup_index.save(args.index)
+
+    stats = generator.get_quality_stats()
+    if stats is not None and not args.random_state:
+        print(
+            f"scramble-generator-cli: rejected {stats['rejected']} of "
+            f"{stats['checked']} scrambles ({stats['rejection_rate']:.2%})",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Cubie level model of the 3x3 (and 2x2, which is just its corners) with the
+coordinates used by the random-state solvers.
+
+Corners are URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB and edges are UR, UF, UL, UB,
+DR, DF, DL, DB, FR, FL, BL, BR. Face turns are indexed face * 3 + power - 1 with
+faces in U, R, F, D, L, B order, so move 4 is R2 and move 17 is B'.
+"""
+
+from math import comb, factorial
+
+FACES = ("U", "R", "F", "D", "L", "B")
+SLICE_EDGES = (8, 9, 10, 11)
+
+# * Each face turn as (corner permutation, corner twist, edge permutation, edge flip)
+BASIC_MOVES = (
+    (
+        (3, 0, 1, 2, 4, 5, 6, 7),
+        (0, 0, 0, 0, 0, 0, 0, 0),
+        (3, 0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11),
+        (0,) * 12,
+    ),
+    (
+        (4, 1, 2, 0, 7, 5, 6, 3),
+        (2, 0, 0, 1, 1, 0, 0, 2),
+        (8, 1, 2, 3, 11, 5, 6, 7, 4, 9, 10, 0),
+        (0,) * 12,
+    ),
+    (
+        (1, 5, 2, 3, 0, 4, 6, 7),
+        (1, 2, 0, 0, 2, 1, 0, 0),
+        (0, 9, 2, 3, 4, 8, 6, 7, 1, 5, 10, 11),
+        (0, 1, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0),
+    ),
+    (
+        (0, 1, 2, 3, 5, 6, 7, 4),
+        (0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 1, 2, 3, 5, 6, 7, 4, 8, 9, 10, 11),
+        (0,) * 12,
+    ),
+    (
+        (0, 2, 6, 3, 4, 1, 5, 7),
+        (0, 1, 2, 0, 0, 2, 1, 0),
+        (0, 1, 10, 3, 4, 5, 9, 7, 8, 2, 6, 11),
+        (0,) * 12,
+    ),
+    (
+        (0, 1, 3, 7, 4, 5, 2, 6),
+        (0, 0, 1, 2, 0, 0, 2, 1),
+        (0, 1, 2, 11, 4, 5, 6, 10, 8, 9, 3, 7),
+        (0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 1, 1),
+    ),
+)
+
+
+class CubieCube:
+    __slots__ = ("cp", "co", "ep", "eo")
+
+    def __init__(self, cp=None, co=None, ep=None, eo=None):
+        self.cp = list(cp) if cp is not None else list(range(8))
+        self.co = list(co) if co is not None else [0] * 8
+        self.ep = list(ep) if ep is not None else list(range(12))
+        self.eo = list(eo) if eo is not None else [0] * 12
+
+    def multiply(self, other):
+        """Return this cube followed by other."""
+        return CubieCube(
+            [self.cp[i] for i in other.cp],
+            [(self.co[other.cp[i]] + other.co[i]) % 3 for i in range(8)],
+            [self.ep[i] for i in other.ep],
+            [(self.eo[other.ep[i]] + other.eo[i]) % 2 for i in range(12)],
+        )
+
+    def apply(self, move):
+        return self.multiply(MOVE_CUBES[move])
+
+    def is_solvable(self):
+        return (
+            sum(self.co) % 3 == 0
+            and sum(self.eo) % 2 == 0
+            and permutation_parity(self.cp) == permutation_parity(self.ep)
+        )
+
+    # * Phase 1 coordinates
+    def get_twist(self):
+        return orientation_to_index(self.co, 3)
+
+    def get_flip(self):
+        return orientation_to_index(self.eo, 2)
+
+    def get_slice(self):
+        return combination_to_index([edge in SLICE_EDGES for edge in self.ep])
+
+    # * Phase 2 coordinates, only meaningful once the slice edges are in the slice
+    def get_corner_permutation(self):
+        return permutation_to_index(self.cp)
+
+    def get_edge_permutation(self):
+        return permutation_to_index(self.ep[:8])
+
+    def get_slice_permutation(self):
+        return permutation_to_index([edge - 8 for edge in self.ep[8:]])
+
+
+def permutation_to_index(permutation):
+    """Lehmer code of a permutation of 0..n-1."""
+    index = 0
+    size = len(permutation)
+    for position in range(size):
+        smaller = sum(
+            1 for later in permutation[position + 1 :] if later < permutation[position]
+        )
+        index += smaller * factorial(size - 1 - position)
+    return index
+
+
+def index_to_permutation(index, size):
+    remaining = list(range(size))
+    permutation = []
+    for position in range(size):
+        weight = factorial(size - 1 - position)
+        permutation.append(remaining.pop(index // weight))
+        index %= weight
+    return permutation
+
+
+def permutation_parity(permutation):
+    parity = 0
+    for i in range(len(permutation)):
+        for j in range(i + 1, len(permutation)):
+            parity ^= permutation[i] > permutation[j]
+    return parity
+
+
+def orientation_to_index(orientation, base):
+    # * The last piece is implied by the others, so it is left out of the index
+    index = 0
+    for value in orientation[:-1]:
+        index = index * base + value
+    return index
+
+
+def index_to_orientation(index, size, base):
+    orientation = [0] * size
+    for position in range(size - 2, -1, -1):
+        orientation[position] = index % base
+        index //= base
+    orientation[-1] = -sum(orientation) % base
+    return orientation
+
+
+def combination_to_index(occupied):
+    """Index of which positions are occupied among len(occupied) positions."""
+    index = 0
+    found = 0
+    for position, is_occupied in enumerate(occupied):
+        if is_occupied:
+            found += 1
+            index += comb(position, found)
+    return index
+
+
+def index_to_combination(index, size, count):
+    occupied = [False] * size
+    for position in range(size - 1, -1, -1):
+        if count and index >= comb(position, count):
+            occupied[position] = True
+            index -= comb(position, count)
+            count -= 1
+    return occupied
+
+
+def build_move_cubes():
+    move_cubes = []
+    for cp, co, ep, eo in BASIC_MOVES:
+        turn = CubieCube(cp, co, ep, eo)
+        cube = turn
+        for _ in range(3):
+            move_cubes.append(cube)
+            cube = cube.multiply(turn)
+    return tuple(move_cubes)
+
+
+MOVE_CUBES = build_move_cubes()
+SOLVED_SLICE = CubieCube().get_slice()
+
+
+def inverse_move(move):
+    return move - move % 3 + 2 - move % 3
+
+
+def format_moves(moves, faces=FACES):
+    return " ".join(faces[move // 3] + ("", "2", "'")[move % 3] for move in moves)
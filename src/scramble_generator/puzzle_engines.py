@@ -0,0 +1,173 @@
+"""
+Move tables for the puzzles whose scrambles are not plain face turns: Megaminx,
+Square-1 and Clock.
+
+Every engine returns a MoveTable, so the batch, streaming and parallel APIs
+sample them like any other puzzle. Megaminx and Clock scrambles follow a fixed
+pattern, so each move index also stands for its place in the pattern and the
+next-move rows stay keyed by the last move. Which Square-1 moves are legal
+depends on the puzzle's shape instead, so its shapes and the moves between them
+are found once by breadth-first search and kept in the table cache. Checking a
+move is then a single lookup.
+"""
+
+from array import array
+
+from .puzzle_registry import MoveTable
+from .table_cache import table_cache
+
+TABLE_VERSION = 1
+
+# * Pochmann style: ten alternating R and D moves, then a U turn ends the line
+MEGAMINX_FACES = ("R", "D", "U")
+MEGAMINX_LINE_MOVES = 10
+
+# * WCA order: nine pin settings on the front, turn over, five on the back
+CLOCK_FRONT_PINS = ("UR", "DR", "DL", "UL", "U", "R", "D", "L", "ALL")
+CLOCK_BACK_PINS = ("U", "R", "D", "L", "ALL")
+CLOCK_TURNS = range(-5, 7)
+
+SQUARE1_TURNS = range(-5, 7)
+# * A layer is 12 units of 30 degrees, a set bit marks a unit where a piece starts.
+# * Units 0 to 11 are the top layer and 12 to 23 the bottom one.
+SQUARE1_SOLVED = sum(1 << unit for unit in (0, 2, 3, 5, 6, 8, 9, 11)) | sum(
+    1 << (12 + unit) for unit in (0, 1, 3, 4, 6, 7, 9, 10)
+)
+ILLEGAL = 0xFFFF
+
+
+def build_megaminx_table(puzzle_type="megaminx"):
+    moves = [
+        (column % 2, column, direction)
+        for column in range(MEGAMINX_LINE_MOVES)
+        for direction in (0, 1)
+    ] + [(2, MEGAMINX_LINE_MOVES, direction) for direction in (0, 1)]
+    notation = [
+        MEGAMINX_FACES[face] + (("++", "--") if face < 2 else ("", "'"))[direction]
+        for face, _, direction in moves
+    ]
+
+    def get_column(column):
+        return [index for index, move in enumerate(moves) if move[1] == column]
+
+    return MoveTable.from_rows(
+        puzzle_type,
+        MEGAMINX_FACES,
+        moves,
+        notation,
+        get_column(0),
+        [
+            get_column((column + 1) % (MEGAMINX_LINE_MOVES + 1))
+            for _, column, _ in moves
+        ],
+    )
+
+
+def format_clock_turn(turn):
+    return f"{abs(turn)}{'+' if turn >= 0 else '-'}"
+
+
+def build_clock_table(puzzle_type="clock"):
+    pins = CLOCK_FRONT_PINS + ("y",)
+    positions = [(pins.index(pin), 0) for pin in CLOCK_FRONT_PINS]
+    positions += [(len(CLOCK_FRONT_PINS), 0)]
+    positions += [(pins.index(pin), 1) for pin in CLOCK_BACK_PINS]
+
+    moves, notation, position_moves = [], [], []
+    for pin, side in positions:
+        # * Turning the puzzle over is the only choice between the two sides
+        turns = [2] if pins[pin] == "y" else CLOCK_TURNS
+        position_moves.append(range(len(moves), len(moves) + len(turns)))
+        for turn in turns:
+            moves.append((pin, side, turn))
+            notation.append(
+                "y2" if pins[pin] == "y" else pins[pin] + format_clock_turn(turn)
+            )
+
+    next_choices = []
+    for position, indexes in enumerate(position_moves):
+        following = position_moves[(position + 1) % len(position_moves)]
+        next_choices += [following] * len(indexes)
+
+    return MoveTable.from_rows(
+        puzzle_type, pins, moves, notation, position_moves[0], next_choices
+    )
+
+
+def rotate_layer(layer, turn):
+    turn %= 12
+    return ((layer << turn) | (layer >> (12 - turn))) & 0xFFF
+
+
+def can_slice(layer):
+    # * The slice cuts between units 11 and 0 and between 5 and 6
+    return layer & 0x41 == 0x41
+
+
+def build_square1_transitions():
+    """
+    Breadth-first search over every shape reachable from solved, returning the
+    flat state * len(moves) + move table of next shapes, or ILLEGAL.
+    """
+    moves = [(top, bottom) for top in SQUARE1_TURNS for bottom in SQUARE1_TURNS]
+    states = {SQUARE1_SOLVED: 0}
+    order = [SQUARE1_SOLVED]
+    transitions = array("H")
+
+    for shape in order:
+        top, bottom = shape & 0xFFF, shape >> 12
+        for top_turn, bottom_turn in moves:
+            turned_top = rotate_layer(top, top_turn)
+            turned_bottom = rotate_layer(bottom, bottom_turn)
+            if (
+                not (top_turn or bottom_turn)
+                or not can_slice(turned_top)
+                or not can_slice(turned_bottom)
+            ):
+                transitions.append(ILLEGAL)
+                continue
+
+            # * The slice swaps units 6 to 11 of the top with 0 to 5 of the bottom
+            sliced = (
+                (turned_top & 0x3F)
+                | (turned_bottom & 0x3F) << 6
+                | ((turned_bottom & 0xFC0) | turned_top >> 6) << 12
+            )
+            if sliced not in states:
+                states[sliced] = len(order)
+                order.append(sliced)
+            transitions.append(states[sliced])
+
+    return transitions
+
+
+def build_square1_table(puzzle_type="square-1"):
+    moves = [(top, bottom) for top in SQUARE1_TURNS for bottom in SQUARE1_TURNS]
+    transitions = table_cache.get(
+        "square-1-shapes", TABLE_VERSION, "H", build_square1_transitions
+    )
+    next_choices = [
+        [
+            move
+            for move, shape in enumerate(transitions[start : start + len(moves)])
+            if shape != ILLEGAL
+        ]
+        for start in range(0, len(transitions), len(moves))
+    ]
+
+    return MoveTable.from_rows(
+        puzzle_type,
+        (),
+        moves,
+        [f"({top},{bottom}) /" for top, bottom in moves],
+        next_choices[0],
+        next_choices,
+        transitions,
+    )
+
+
+ENGINES = {
+    "megaminx": build_megaminx_table,
+    "square-1": build_square1_table,
+    "clock": build_clock_table,
+}
@@ -0,0 +1,320 @@
+import itertools
+import re
+
+from .yaml_file_handler import YamlFileHandler
+
+CUBE_FACES = ("U", "D", "L", "R", "F", "B")
+CUBE_AXES = (("U", "D"), ("L", "R"), ("F", "B"))
+CUBE_PATTERN = re.compile(r"(\d+)x\1")
+# * Directions are 0 clockwise, 1 counter-clockwise and 2 a half turn
+INVERSE_DIRECTIONS = (1, 0, 2)
+# * Default moves for cubes past the last configured size grow by this per layer
+MOVES_PER_EXTRA_LAYER = 10
+# * Largest NxN built. Tables grow linearly with N, but past this the default
+# * scramble is thousands of moves long
+MAX_CUBE_SIZE = 255
+
+
+def format_move(face, depth, direction):
+    """WCA notation, depth counts the layers turned together: R, Rw, 3Rw', 4Rw2."""
+    prefix = str(depth) if depth > 2 else ""
+    wide = "w" if depth > 1 else ""
+    return prefix + face + wide + ("", "'", "2")[direction]
+
+
+class SkipRange:
+    """Every move index under size except start to stop, without listing them."""
+
+    __slots__ = ("size", "start", "stop", "skipped")
+
+    def __init__(self, size, start, stop):
+        self.size = size
+        self.start = start
+        self.stop = stop
+        self.skipped = stop - start
+
+    def __len__(self):
+        return self.size - self.skipped
+
+    def __getitem__(self, index):
+        return index if index < self.start else index + self.skipped
+
+    def __iter__(self):
+        return itertools.chain(range(self.start), range(self.stop, self.size))
+
+
+class MoveTable:
+    """
+    Integer encoding of a puzzle's moves plus its precomputed next-move rows.
+
+    Rows are keyed by the last move. Tables built from_rows with transitions key
+    them by a state instead, which moves from state * len(moves) + move to the
+    next one, starting from state 0. Moves ending on the same block share a row,
+    and past 256 moves a row is a SkipRange, so big cube tables grow linearly.
+    """
+
+    __slots__ = (
+        "puzzle_type",
+        "faces",
+        "moves",
+        "notation",
+        "inverses",
+        "typecode",
+        "first_row",
+        "next_rows",
+        "canonical_next_rows",
+        "transitions",
+    )
+
+    def __init__(self, puzzle_type, faces, moves, inverses, axis_orders):
+        self.puzzle_type = puzzle_type
+        self.faces = tuple(faces)
+        self.moves = tuple(moves)
+        self.inverses = tuple(inverses)
+        self.notation = tuple(
+            format_move(self.faces[face], depth, direction)
+            for face, depth, direction in self.moves
+        )
+        self.typecode, limit = self.get_typecode(len(self.moves))
+        self.transitions = None
+
+        num_moves = len(self.moves)
+        self.first_row = self.build_row(range(num_moves), limit)
+
+        # * Nothing follows a turn of the same block, so no U U2 or R' R
+        blocks = {}
+        for index, (face, depth, _) in enumerate(self.moves):
+            blocks.setdefault((face, depth), []).append(index)
+        rows = {
+            block: self.build_row(self.get_choices(num_moves, excluded), limit)
+            for block, excluded in blocks.items()
+        }
+        self.next_rows = tuple(rows[face, depth] for face, depth, _ in self.moves)
+
+        # * Moves on one axis commute, so a run of them is only allowed in strictly
+        # * increasing order. That rules out repeats (U U2), inverses (R R') and
+        # * commuted patterns (U D U) with the same cost per move as the plain rows.
+        axes = {}
+        for index, (axis, order) in enumerate(axis_orders):
+            axes.setdefault(axis, []).append((order, index))
+        rows = {}
+        for axis, members in axes.items():
+            members.sort()
+            for position, (order, _) in enumerate(members, start=1):
+                # * Each order's row leaves out every move on the axis up to it
+                if position == len(members) or members[position][0] != order:
+                    excluded = [index for _, index in members[:position]]
+                    rows[axis, order] = self.build_row(
+                        self.get_choices(num_moves, excluded), limit
+                    )
+        self.canonical_next_rows = tuple(
+            rows[axis, order] for axis, order in axis_orders
+        )
+
+    @classmethod
+    def from_rows(
+        cls,
+        puzzle_type,
+        faces,
+        moves,
+        notation,
+        first_choices,
+        next_choices,
+        transitions=None,
+    ):
+        """
+        A table for a puzzle engine that works out which moves may follow which
+        itself. Its rows already leave out redundant moves, so they double as the
+        canonical rows, and rows with the same choices are built only once.
+        """
+        table = cls.__new__(cls)
+        table.puzzle_type = puzzle_type
+        table.faces = tuple(faces)
+        table.moves = tuple(moves)
+        table.notation = tuple(notation)
+        table.inverses = None
+        table.typecode, limit = cls.get_typecode(len(table.moves))
+        table.transitions = transitions
+        rows = {}
+
+        def get_row(choices):
+            choices = tuple(choices)
+            if choices not in rows:
+                rows[choices] = cls.build_row(choices, limit)
+            return rows[choices]
+
+        table.first_row = get_row(first_choices)
+        table.next_rows = tuple(map(get_row, next_choices))
+        table.canonical_next_rows = table.next_rows
+        return table
+
+    @staticmethod
+    def get_typecode(num_moves):
+        # * Moves are drawn from random bytes, or 16-bit words past 256 moves
+        return ("B", 256) if num_moves <= 256 else ("H", 65536)
+
+    @staticmethod
+    def get_choices(num_moves, excluded):
+        start, stop = min(excluded), max(excluded) + 1
+        # * Small tables keep plain tuples, indexing them is faster in the sampler
+        if num_moves > 256 and stop - start == len(excluded):
+            return SkipRange(num_moves, start, stop)
+        excluded = set(excluded)
+        return tuple(index for index in range(num_moves) if index not in excluded)
+
+    @staticmethod
+    def build_row(choices, limit=256):
+        # * Values at or above the bound are rejected so every choice is equally likely
+        size = len(choices)
+        if not isinstance(choices, SkipRange):
+            choices = tuple(choices)
+        return size, limit - limit % size, choices
+
+
+class PuzzleRegistry:
+    """
+    Builds move tables from puzzle definitions on first use and caches them.
+
+    NxN cubes from 2x2 to MAX_CUBE_SIZE are derived from N: every face turns
+    blocks of 1 to N // 2 outer layers, a quarter turn either way or a half turn.
+    On even cubes only U, R and F turn the N / 2 deep block. Everything
+    else (and any cube that needs a reduced face set, like the 2x2) comes from
+    the puzzle_definitions section of config.yaml. Megaminx, Square-1 and Clock
+    come from the engines in puzzle_engines.
+    """
+
+    def __init__(self, config_filename="resources/configs/config.yaml"):
+        self.config_filename = config_filename
+        self.config = None
+        self.definitions = None
+        self.move_tables = {}
+
+    def get_config(self):
+        if self.config is None:
+            self.config = YamlFileHandler(self.config_filename).load_yaml_file()
+
+        return self.config
+
+    def get_definitions(self):
+        if self.definitions is None:
+            definitions = self.get_config().get("puzzle_definitions") or {}
+            self.definitions = {
+                str(name).lower(): definition
+                for name, definition in definitions.items()
+            }
+
+        return self.definitions
+
+    def get_definition(self, puzzle_type):
+        definition = dict(self.get_definitions().get(puzzle_type, {}))
+        cube = CUBE_PATTERN.fullmatch(puzzle_type)
+
+        if cube:
+            size = int(cube.group(1))
+            # * A 1x1 has no layers to turn and would fall back to 3x3 notation
+            if size < 2:
+                raise ValueError(f"Unknown puzzle type: {puzzle_type}")
+            if size > MAX_CUBE_SIZE:
+                raise ValueError(
+                    f"Cubes up to {MAX_CUBE_SIZE}x{MAX_CUBE_SIZE} are supported, "
+                    f"not {puzzle_type}"
+                )
+            definition.setdefault("faces", CUBE_FACES)
+            definition.setdefault("layers", size // 2)
+            definition.setdefault("directions", [0, 1, 2])
+            if size % 2 == 0:
+                # * A half-cube block on the opposite face is the same turn plus a
+                # * rotation, so as in WCA scrambles only U, R and F turn it
+                definition.setdefault("deepest_faces", ["U", "R", "F"])
+            definition.setdefault(
+                "axes",
+                [
+                    [face for face in axis if face in definition["faces"]]
+                    for axis in CUBE_AXES
+                ],
+            )
+        elif "faces" not in definition:
+            raise ValueError(f"Unknown puzzle type: {puzzle_type}")
+
+        definition.setdefault("layers", 1)
+        definition.setdefault("directions", [0, 1])
+        definition.setdefault("deepest_faces", definition["faces"])
+        definition.setdefault("axes", [[face] for face in definition["faces"]])
+        return definition
+
+    def get_move_table(self, puzzle_type):
+        puzzle_type = puzzle_type.lower()
+
+        if puzzle_type not in self.move_tables:
+            # * Imported here, the engines build their tables on MoveTable
+            from .puzzle_engines import ENGINES
+
+            if puzzle_type in ENGINES:
+                self.move_tables[puzzle_type] = ENGINES[puzzle_type](puzzle_type)
+            else:
+                self.move_tables[puzzle_type] = self.build_move_table(puzzle_type)
+
+        return self.move_tables[puzzle_type]
+
+    def build_move_table(self, puzzle_type):
+        definition = self.get_definition(puzzle_type)
+        faces, layers = definition["faces"], definition["layers"]
+        moves = [
+            (face, depth, direction)
+            for face in range(len(faces))
+            for depth in range(1, layers + 1)
+            if depth < layers or faces[face] in definition["deepest_faces"]
+            for direction in definition["directions"]
+        ]
+        positions = {move: index for index, move in enumerate(moves)}
+        inverses = [
+            positions[face, depth, INVERSE_DIRECTIONS[direction]]
+            for face, depth, direction in moves
+        ]
+        return MoveTable(
+            puzzle_type, faces, moves, inverses, self.get_axis_orders(definition, moves)
+        )
+
+    @staticmethod
+    def get_axis_orders(definition, moves):
+        """Give every move its axis and a fixed order among the moves on that axis."""
+        faces, layers = definition["faces"], definition["layers"]
+        face_axes = {}
+
+        for axis, axis_faces in enumerate(definition["axes"]):
+            for position, face in enumerate(axis_faces):
+                face_axes[face] = axis, position
+
+        axis_orders = []
+        for face, depth, _ in moves:
+            axis, position = face_axes[faces[face]]
+            axis_orders.append((axis, position * (layers + 1) + depth))
+
+        return axis_orders
+
+    def get_default_num_moves(self, puzzle_type):
+        """
+        The configured default, or for a cube past the largest configured one, that
+        default plus MOVES_PER_EXTRA_LAYER for every layer it has over it.
+        """
+        puzzle_type = puzzle_type.lower()
+        defaults = {
+            str(name).lower(): moves
+            for name, moves in self.get_config()["puzzle_default_moves"].items()
+        }
+        if puzzle_type in defaults:
+            return defaults[puzzle_type]
+
+        cube = CUBE_PATTERN.fullmatch(puzzle_type)
+        size, moves = 0, None
+        for name, default in defaults.items():
+            match = CUBE_PATTERN.fullmatch(name)
+            if match and int(match.group(1)) > size:
+                size, moves = int(match.group(1)), default
+
+        if not cube or moves is None:
+            return self.get_config()["defaults"]["num_moves"]
+        return moves + MOVES_PER_EXTRA_LAYER * max(int(cube.group(1)) - size, 0)
+
+
+registry = PuzzleRegistry()
@@ -0,0 +1,242 @@
+"""
+Sticker level state simulator for the NxN cubes, pyraminx and skewb.
+
+A state is a flat bytes buffer with one colour per sticker. Every move in a
+puzzle's MoveTable is precomputed once as a sticker permutation, wrapped in
+operator.itemgetter, so applying a scramble is one C-level gather per move.
+"""
+
+import math
+from operator import eq, itemgetter
+
+from .puzzle_registry import CUBE_PATTERN, registry
+
+CUBE_NORMALS = {
+    "U": (0, 1, 0),
+    "D": (0, -1, 0),
+    "L": (-1, 0, 0),
+    "R": (1, 0, 0),
+    "F": (0, 0, 1),
+    "B": (0, 0, -1),
+}
+PYRAMINX_VERTICES = {
+    "U": (1, 1, 1),
+    "L": (-1, -1, 1),
+    "R": (1, -1, -1),
+    "B": (-1, 1, -1),
+}
+SKEWB_CORNERS = {
+    "L": (-1, -1, 1),
+    "R": (1, -1, -1),
+    "F": (1, -1, 1),
+    "B": (-1, -1, -1),
+}
+
+
+def dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def rotate(point, axis, angle):
+    """Rodrigues rotation of point about a unit axis, counter-clockwise for angle > 0."""
+    cos, sin = math.cos(angle), math.sin(angle)
+    x, y, z = point
+    ux, uy, uz = axis
+    along = dot(axis, point) * (1 - cos)
+    return (
+        x * cos + (uy * z - uz * y) * sin + ux * along,
+        y * cos + (uz * x - ux * z) * sin + uy * along,
+        z * cos + (ux * y - uy * x) * sin + uz * along,
+    )
+
+
+def unit(vector):
+    length = math.sqrt(dot(vector, vector))
+    return tuple(value / length for value in vector)
+
+
+def point_key(point):
+    return tuple(round(value, 6) for value in point)
+
+
+def build_cube(size, faces):
+    """Stickers on [-size, size]^3 so every sticker centre has integer coordinates."""
+    centroids, colors = [], []
+    grid = range(1 - size, size, 2)
+
+    for color, normal in enumerate(CUBE_NORMALS.values()):
+        axis = normal.index(next(value for value in normal if value))
+        for a in grid:
+            for b in grid:
+                point = [a, b]
+                point.insert(axis, normal[axis] * size)
+                centroids.append(tuple(point))
+                colors.append(color)
+
+    def get_turn(face, depth):
+        # * Layer k from the face covers size - 2k < dot <= size - 2k + 2, a block
+        # * move turns the outer depth layers together
+        normal = CUBE_NORMALS[face]
+        low = size - 2 * depth
+
+        def is_turned(point):
+            return dot(point, normal) > low
+
+        return normal, is_turned, math.pi / 2
+
+    return centroids, colors, get_turn
+
+
+def build_pyraminx(faces):
+    vertices = list(PYRAMINX_VERTICES.values())
+    centroids, colors = [], []
+
+    # * Face i is the one opposite vertex i, cut into 9 triangles
+    for color, vertex in enumerate(vertices):
+        a, b, c = [other for other in vertices if other is not vertex]
+        grid = {
+            (i, j): tuple(
+                a[k] + (b[k] - a[k]) * i / 3 + (c[k] - a[k]) * j / 3 for k in range(3)
+            )
+            for i in range(4)
+            for j in range(4 - i)
+        }
+        triangles = [
+            ((i, j), (i + 1, j), (i, j + 1)) for i in range(3) for j in range(3 - i)
+        ] + [
+            ((i + 1, j), (i, j + 1), (i + 1, j + 1))
+            for i in range(2)
+            for j in range(2 - i)
+        ]
+        for triangle in triangles:
+            points = [grid[corner] for corner in triangle]
+            centroids.append(tuple(sum(p[k] for p in points) / 3 for k in range(3)))
+            colors.append(color)
+
+    def get_turn(face, depth):
+        vertex = PYRAMINX_VERTICES[face.upper()]
+        # * Along a vertex axis the puzzle spans -1 (opposite face) to 3 (the tip)
+        threshold = 5 / 3 if face.islower() else 1 / 3
+
+        def is_turned(point):
+            return dot(point, vertex) > threshold
+
+        return vertex, is_turned, 2 * math.pi / 3
+
+    return centroids, colors, get_turn
+
+
+def build_skewb(faces):
+    centroids, colors = [], []
+
+    for color, normal in enumerate(CUBE_NORMALS.values()):
+        centroids.append(normal)
+        colors.append(color)
+        axis = normal.index(next(value for value in normal if value))
+        for sign_a in (-1, 1):
+            for sign_b in (-1, 1):
+                corner = [sign_a, sign_b]
+                corner.insert(axis, normal[axis])
+                points = [corner]
+                for zeroed in range(3):
+                    if zeroed != axis:
+                        point = list(corner)
+                        point[zeroed] = 0
+                        points.append(point)
+                centroids.append(tuple(sum(p[k] for p in points) / 3 for k in range(3)))
+                colors.append(color)
+
+    def get_turn(face, depth):
+        corner = SKEWB_CORNERS[face]
+
+        def is_turned(point):
+            return dot(point, corner) > 0
+
+        return corner, is_turned, 2 * math.pi / 3
+
+    return centroids, colors, get_turn
+
+
+def build_geometry(puzzle_type, faces):
+    cube = CUBE_PATTERN.fullmatch(puzzle_type)
+    if cube:
+        return build_cube(int(cube.group(1)), faces)
+    if puzzle_type == "pyraminx":
+        return build_pyraminx(faces)
+    if puzzle_type == "skewb":
+        return build_skewb(faces)
+    raise ValueError(f"No state model for puzzle type: {puzzle_type}")
+
+
+class PuzzleModel:
+    def __init__(self, move_table):
+        self.move_table = move_table
+        centroids, colors, get_turn = build_geometry(
+            move_table.puzzle_type, move_table.faces
+        )
+        self.solved = bytes(colors)
+        self.num_stickers = len(colors)
+
+        positions = {point_key(point): index for index, point in enumerate(centroids)}
+        self.permutations = []
+        for face, depth, direction in move_table.moves:
+            axis, is_turned, angle = get_turn(move_table.faces[face], depth)
+            # * Clockwise seen from outside is a negative turn about the outward axis
+            angle *= (-1, 1, 2)[direction]
+            axis = unit(axis)
+
+            permutation = list(range(self.num_stickers))
+            for index, point in enumerate(centroids):
+                if is_turned(point):
+                    target = positions[point_key(rotate(point, axis, angle))]
+                    permutation[target] = index
+            self.permutations.append(tuple(permutation))
+
+        self.gathers = tuple(
+            itemgetter(*permutation) for permutation in self.permutations
+        )
+
+    def apply(self, moves, state=None):
+        """Return the state after applying move indexes to state (solved by default)."""
+        gathers = self.gathers
+        state = self.solved if state is None else state
+        for move in moves:
+            state = gathers[move](state)
+        return bytes(state)
+
+    def apply_scramble(self, scramble):
+        return self.apply(scramble.moves)
+
+    def is_solved(self, state):
+        return state == self.solved
+
+    def solved_fraction(self, state):
+        """Share of stickers that still show their solved colour."""
+        return sum(map(eq, state, self.solved)) / self.num_stickers
+
+
+models = {}
+
+
+def get_model(move_table):
+    """Return the shared model for a MoveTable, or for a puzzle type's own table."""
+    if isinstance(move_table, str):
+        move_table = registry.get_move_table(move_table)
+
+    # * Keyed by table, so a model can be built for any MoveTable passed in
+    if move_table not in models:
+        models[move_table] = PuzzleModel(move_table)
+
+    return models[move_table]
+
+
+def find_near_solved(scrambles, max_solved_fraction):
+    """Indexes of scrambles whose end state keeps too many stickers solved."""
+    near_solved = []
+
+    for index, scramble in enumerate(scrambles):
+        model = get_model(scramble.table)
+        if model.solved_fraction(model.apply_scramble(scramble)) > max_solved_fraction:
+            near_solved.append(index)
+
+    return near_solved
@@ -0,0 +1,61 @@
+"""
+Randomness sources for the batched move sampler.
+
+A source only has to hand out random bytes in bulk (randbytes) and be able to
+spawn an independent source for a worker process (spawn).
+"""
+
+import random
+import secrets
+
+
+class SystemRandomSource:
+    """Cryptographically secure bytes from the OS, used for official scrambles."""
+
+    def randbytes(self, n):
+        return secrets.token_bytes(n)
+
+    def spawn(self, key):
+        # * Every process reads its own stream from the OS, nothing to derive
+        return self
+
+
+class SeededRandomSource:
+    """Reproducible bytes from a seeded Mersenne Twister, for fixtures and load tests."""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def randbytes(self, n):
+        return self.rng.randbytes(n)
+
+    def spawn(self, key):
+        return SeededRandomSource(f"{self.seed}:{key}")
+
+
+class NumpyRandomSource:
+    """Reproducible bytes from a seeded NumPy Generator (requires numpy)."""
+
+    def __init__(self, seed):
+        import numpy
+
+        self.seed = seed
+        self.rng = numpy.random.default_rng(seed)
+
+    def randbytes(self, n):
+        return self.rng.bytes(n)
+
+    def spawn(self, key):
+        return NumpyRandomSource([self.seed, key])
+
+
+def randbelow(random_source, n):
+    """Uniform integer in [0, n) from a source's bytes, rejecting the biased tail."""
+    num_bytes = (n.bit_length() + 7) // 8
+    bound = 256**num_bytes // n * n
+
+    while True:
+        value = int.from_bytes(random_source.randbytes(num_bytes), "big")
+        if value < bound:
+            return value % n
@@ -0,0 +1,457 @@
+"""
+Random-state scrambles for the 2x2 and 3x3.
+
+A uniformly random state is picked and solved with a table-driven solver, and
+the scramble is the inverse of that solution. The 2x2 uses a full distance
+table over all 3,674,160 states, the 3x3 a two-phase search with pruning tables
+for each phase. Tables are built once through the table cache, which keeps them in
+the user cache directory and memory-maps them on later runs.
+"""
+
+import threading
+
+from .cubie_cube import (
+    FACES,
+    MOVE_CUBES,
+    SOLVED_SLICE,
+    CubieCube,
+    index_to_combination,
+    index_to_orientation,
+    index_to_permutation,
+    inverse_move,
+    orientation_to_index,
+    permutation_to_index,
+)
+from .puzzle_registry import MoveTable
+from .random_sources import randbelow
+from .table_cache import table_cache
+
+TABLE_VERSION = 1
+UNVISITED = 255
+
+# * Phase 2 keeps the slice edges in the slice: U and D turns plus half turns of the rest
+PHASE2_MOVES = (0, 1, 2, 4, 7, 9, 10, 11, 13, 16)
+MAX_PHASE1_DEPTH = 12
+# * Phase 2 is kept short first so more phase 1 candidates get tried, which finds
+# * solutions far sooner; the full depth is only a fallback
+PHASE2_DEPTH_LIMITS = (12, 18)
+MAX_SOLUTION_LENGTH = 30
+
+# * Scrambles closer to solved than this are redrawn, as for official events
+MIN_DISTANCES = {"2x2": 4, "3x3": 2}
+
+
+def build_distance_table(size_a, moves_a, size_b, moves_b, num_moves, start):
+    """
+    Breadth-first distances over the combined coordinate a * size_b + b.
+
+    Early layers expand the frontier, later ones scan the unvisited states for a
+    neighbour in the frontier instead, which is cheaper once most of the table
+    is filled. The move set has to be closed under inverses for that to work.
+    """
+    total = size_a * size_b
+    rows = [
+        (moves_a[m * size_a : (m + 1) * size_a], moves_b[m * size_b : (m + 1) * size_b])
+        for m in range(num_moves)
+    ]
+    table = bytearray([UNVISITED]) * total
+    table[start] = 0
+    filled, depth = 1, 0
+
+    while filled < total:
+        backwards = filled > total // 3
+        target = UNVISITED if backwards else depth
+        index = table.find(target)
+        added = 0
+
+        while index != -1:
+            a, b = divmod(index, size_b)
+            for row_a, row_b in rows:
+                neighbour = row_a[a] * size_b + row_b[b]
+                if backwards:
+                    if table[neighbour] == depth:
+                        table[index] = depth + 1
+                        added += 1
+                        break
+                elif table[neighbour] == UNVISITED:
+                    table[neighbour] = depth + 1
+                    added += 1
+            index = table.find(target, index + 1)
+
+        if not added:
+            break
+        filled += added
+        depth += 1
+
+    return table
+
+
+def get_face_turn_table(puzzle_type, faces):
+    # * Index face * 3 + power - 1 matches the cubie move numbering
+    moves = [
+        (face, 1, direction) for face in range(len(faces)) for direction in (0, 2, 1)
+    ]
+    inverses = [inverse_move(move) for move in range(len(moves))]
+    axis_orders = [(face % 3, face // 3) for face, _, _ in moves]
+    return MoveTable(puzzle_type, faces, moves, inverses, axis_orders)
+
+
+class PocketCubeSolver:
+    """Optimal 2x2 solver reading a full distance table, with DBL kept fixed."""
+
+    puzzle_type = "2x2"
+    positions = (0, 1, 2, 3, 4, 5, 7)
+    num_moves = 9
+    num_permutations = 5040
+    num_orientations = 729
+
+    def __init__(self):
+        self.move_table = get_face_turn_table(self.puzzle_type, FACES[:3])
+        self.permutation_moves = table_cache.get(
+            "2x2-permutation-moves", TABLE_VERSION, "H", self.build_permutation_moves
+        )
+        self.orientation_moves = table_cache.get(
+            "2x2-orientation-moves", TABLE_VERSION, "H", self.build_orientation_moves
+        )
+        self.distances = table_cache.get(
+            "2x2-distances",
+            TABLE_VERSION,
+            "B",
+            lambda: build_distance_table(
+                self.num_permutations,
+                self.permutation_moves,
+                self.num_orientations,
+                self.orientation_moves,
+                self.num_moves,
+                0,
+            ),
+        )
+
+    def build_permutation_moves(self):
+        positions = self.positions
+        table = []
+        for move in range(self.num_moves):
+            move_cp = MOVE_CUBES[move].cp
+            for index in range(self.num_permutations):
+                cp = list(range(8))
+                for position, piece in zip(positions, index_to_permutation(index, 7)):
+                    cp[position] = positions[piece]
+                cp = [cp[i] for i in move_cp]
+                table.append(
+                    permutation_to_index(
+                        [positions.index(cp[position]) for position in positions]
+                    )
+                )
+        return table
+
+    def build_orientation_moves(self):
+        positions = self.positions
+        table = []
+        for move in range(self.num_moves):
+            for index in range(self.num_orientations):
+                co = [0] * 8
+                for position, twist in zip(
+                    positions, index_to_orientation(index, 7, 3)
+                ):
+                    co[position] = twist
+                cube = CubieCube(co=co).apply(move)
+                table.append(
+                    orientation_to_index(
+                        [cube.co[position] for position in positions], 3
+                    )
+                )
+        return table
+
+    def random_state(self, random_source):
+        return randbelow(random_source, self.num_permutations * self.num_orientations)
+
+    def solve(self, state):
+        permutation, orientation = divmod(state, self.num_orientations)
+        solution = []
+
+        for depth in range(self.distances[state], 0, -1):
+            for move in range(self.num_moves):
+                next_permutation = self.permutation_moves[
+                    move * self.num_permutations + permutation
+                ]
+                next_orientation = self.orientation_moves[
+                    move * self.num_orientations + orientation
+                ]
+                next_state = next_permutation * self.num_orientations + next_orientation
+                if self.distances[next_state] == depth - 1:
+                    solution.append(move)
+                    permutation, orientation = next_permutation, next_orientation
+                    break
+
+        return solution
+
+
+class TwoPhaseSolver:
+    """Kociemba's two-phase 3x3 solver with per-coordinate-pair pruning tables."""
+
+    puzzle_type = "3x3"
+
+    def __init__(self):
+        self.move_table = get_face_turn_table(self.puzzle_type, FACES)
+        self.twist_moves = table_cache.get(
+            "3x3-twist-moves",
+            TABLE_VERSION,
+            "H",
+            lambda: self.build_moves(2187, 18, self.twist_after),
+        )
+        self.flip_moves = table_cache.get(
+            "3x3-flip-moves",
+            TABLE_VERSION,
+            "H",
+            lambda: self.build_moves(2048, 18, self.flip_after),
+        )
+        self.slice_moves = table_cache.get(
+            "3x3-slice-moves",
+            TABLE_VERSION,
+            "H",
+            lambda: self.build_moves(495, 18, self.slice_after),
+        )
+        self.corner_moves = table_cache.get(
+            "3x3-corner-permutation-moves",
+            TABLE_VERSION,
+            "H",
+            lambda: self.build_moves(40320, 10, self.corners_after),
+        )
+        self.edge_moves = table_cache.get(
+            "3x3-edge-permutation-moves",
+            TABLE_VERSION,
+            "H",
+            lambda: self.build_moves(40320, 10, self.edges_after),
+        )
+        self.slice_permutation_moves = table_cache.get(
+            "3x3-slice-permutation-moves",
+            TABLE_VERSION,
+            "H",
+            lambda: self.build_moves(24, 10, self.slice_edges_after),
+        )
+
+        self.twist_slice_distances = table_cache.get(
+            "3x3-twist-slice-distances",
+            TABLE_VERSION,
+            "B",
+            lambda: build_distance_table(
+                2187, self.twist_moves, 495, self.slice_moves, 18, SOLVED_SLICE
+            ),
+        )
+        self.flip_slice_distances = table_cache.get(
+            "3x3-flip-slice-distances",
+            TABLE_VERSION,
+            "B",
+            lambda: build_distance_table(
+                2048, self.flip_moves, 495, self.slice_moves, 18, SOLVED_SLICE
+            ),
+        )
+        self.corner_slice_distances = table_cache.get(
+            "3x3-corner-slice-distances",
+            TABLE_VERSION,
+            "B",
+            lambda: build_distance_table(
+                40320, self.corner_moves, 24, self.slice_permutation_moves, 10, 0
+            ),
+        )
+        self.edge_slice_distances = table_cache.get(
+            "3x3-edge-slice-distances",
+            TABLE_VERSION,
+            "B",
+            lambda: build_distance_table(
+                40320, self.edge_moves, 24, self.slice_permutation_moves, 10, 0
+            ),
+        )
+
+    @staticmethod
+    def build_moves(size, num_moves, after):
+        moves = range(18) if num_moves == 18 else PHASE2_MOVES
+        return [after(index, move) for move in moves for index in range(size)]
+
+    @staticmethod
+    def twist_after(index, move):
+        return CubieCube(co=index_to_orientation(index, 8, 3)).apply(move).get_twist()
+
+    @staticmethod
+    def flip_after(index, move):
+        return CubieCube(eo=index_to_orientation(index, 12, 2)).apply(move).get_flip()
+
+    @staticmethod
+    def slice_after(index, move):
+        occupied = index_to_combination(index, 12, 4)
+        slice_edges, other_edges = iter(range(8, 12)), iter(range(8))
+        ep = [next(slice_edges if is_slice else other_edges) for is_slice in occupied]
+        return CubieCube(ep=ep).apply(move).get_slice()
+
+    @staticmethod
+    def corners_after(index, move):
+        cp = index_to_permutation(index, 8)
+        return permutation_to_index([cp[i] for i in MOVE_CUBES[move].cp])
+
+    @staticmethod
+    def edges_after(index, move):
+        ep = index_to_permutation(index, 8) + [8, 9, 10, 11]
+        return permutation_to_index([ep[i] for i in MOVE_CUBES[move].ep][:8])
+
+    @staticmethod
+    def slice_edges_after(index, move):
+        ep = list(range(8)) + [8 + edge for edge in index_to_permutation(index, 4)]
+        return permutation_to_index([ep[i] - 8 for i in MOVE_CUBES[move].ep][8:])
+
+    def random_state(self, random_source):
+        while True:
+            cube = CubieCube(
+                index_to_permutation(randbelow(random_source, 40320), 8),
+                index_to_orientation(randbelow(random_source, 2187), 8, 3),
+                index_to_permutation(randbelow(random_source, 479001600), 12),
+                index_to_orientation(randbelow(random_source, 2048), 12, 2),
+            )
+            if cube.is_solvable():
+                return cube
+
+    def solve(self, cube):
+        # * Search state stays in arguments, one shared solver serves every thread
+        twist, flip, slice_ = cube.get_twist(), cube.get_flip(), cube.get_slice()
+
+        start = self.phase1_distance(twist, flip, slice_)
+
+        for phase2_depth_limit in PHASE2_DEPTH_LIMITS:
+            for depth in range(start, MAX_PHASE1_DEPTH + 1):
+                solution = self.search_phase1(
+                    cube, phase2_depth_limit, twist, flip, slice_, depth, -1, []
+                )
+                if solution is not None:
+                    return solution
+
+        raise RuntimeError("No two-phase solution found")
+
+    def phase1_distance(self, twist, flip, slice_):
+        return max(
+            self.twist_slice_distances[twist * 495 + slice_],
+            self.flip_slice_distances[flip * 495 + slice_],
+        )
+
+    def search_phase1(
+        self, cube, phase2_depth_limit, twist, flip, slice_, depth, last_face, moves
+    ):
+        if depth == 0:
+            # * Ending on a phase 2 move means a shorter phase 1 was already tried
+            if moves and moves[-1] in PHASE2_MOVES:
+                return None
+            return self.start_phase2(cube, phase2_depth_limit, moves)
+
+        for move in range(18):
+            face = move // 3
+            if face == last_face or face == last_face - 3:
+                continue
+
+            next_twist = self.twist_moves[move * 2187 + twist]
+            next_flip = self.flip_moves[move * 2048 + flip]
+            next_slice = self.slice_moves[move * 495 + slice_]
+            if self.phase1_distance(next_twist, next_flip, next_slice) >= depth:
+                continue
+
+            moves.append(move)
+            solution = self.search_phase1(
+                cube,
+                phase2_depth_limit,
+                next_twist,
+                next_flip,
+                next_slice,
+                depth - 1,
+                face,
+                moves,
+            )
+            if solution is not None:
+                return solution
+            moves.pop()
+
+        return None
+
+    def start_phase2(self, cube, phase2_depth_limit, phase1_moves):
+        for move in phase1_moves:
+            cube = cube.apply(move)
+
+        corners = cube.get_corner_permutation()
+        edges = cube.get_edge_permutation()
+        slice_edges = cube.get_slice_permutation()
+        max_depth = min(phase2_depth_limit, MAX_SOLUTION_LENGTH - len(phase1_moves))
+        last_face = phase1_moves[-1] // 3 if phase1_moves else -1
+
+        start = self.phase2_distance(corners, edges, slice_edges)
+        for depth in range(start, max_depth + 1):
+            moves = []
+            if self.search_phase2(corners, edges, slice_edges, depth, last_face, moves):
+                return phase1_moves + moves
+
+        return None
+
+    def phase2_distance(self, corners, edges, slice_edges):
+        return max(
+            self.corner_slice_distances[corners * 24 + slice_edges],
+            self.edge_slice_distances[edges * 24 + slice_edges],
+        )
+
+    def search_phase2(self, corners, edges, slice_edges, depth, last_face, moves):
+        if depth == 0:
+            return corners == 0 and edges == 0 and slice_edges == 0
+
+        for index, move in enumerate(PHASE2_MOVES):
+            face = move // 3
+            if face == last_face or face == last_face - 3:
+                continue
+
+            # * Checked one table at a time since this is the solver's hottest loop
+            next_corners = self.corner_moves[index * 40320 + corners]
+            next_slice_edges = self.slice_permutation_moves[index * 24 + slice_edges]
+            if (
+                self.corner_slice_distances[next_corners * 24 + next_slice_edges]
+                >= depth
+            ):
+                continue
+            next_edges = self.edge_moves[index * 40320 + edges]
+            if self.edge_slice_distances[next_edges * 24 + next_slice_edges] >= depth:
+                continue
+
+            moves.append(move)
+            if self.search_phase2(
+                next_corners, next_edges, next_slice_edges, depth - 1, face, moves
+            ):
+                return True
+            moves.pop()
+
+        return False
+
+
+SOLVERS = {"2x2": PocketCubeSolver, "3x3": TwoPhaseSolver}
+solvers = {}
+solvers_lock = threading.Lock()
+
+
+def get_solver(puzzle_type):
+    puzzle_type = puzzle_type.lower()
+
+    if puzzle_type not in SOLVERS:
+        raise ValueError(f"Random-state scrambles are not supported for {puzzle_type}")
+    with solvers_lock:
+        if puzzle_type not in solvers:
+            solvers[puzzle_type] = SOLVERS[puzzle_type]()
+
+    return solvers[puzzle_type]
+
+
+def prefetch_solver(puzzle_type):
+    """Load or build a solver's tables in the background, returning a Future."""
+    return table_cache.submit(get_solver, puzzle_type)
+
+
+def generate_random_state_moves(puzzle_type, random_source):
+    """Return the move indexes of a scramble for a uniformly random state."""
+    solver = get_solver(puzzle_type)
+
+    while True:
+        solution = solver.solve(solver.random_state(random_source))
+        if len(solution) >= MIN_DISTANCES[solver.puzzle_type]:
+            return solver.move_table, [
+                inverse_move(move) for move in reversed(solution)
+            ]
@@ -1,507 +1,433 @@
-import secrets
+import itertools
+import os
+import sys
+from array import array
+from collections import deque
+
+from .puzzle_registry import registry
+from .random_sources import SystemRandomSource
+from .scramble_index import ScrambleIndexError
+from .scramble_quality import QualityFilter
+
+CHUNK_SCRAMBLES = 1024
+# * This many repeats in a row means the dedup index cannot be satisfied any more
+MAX_REPEATS = 10_000
+
+
+class Scramble:
+    """A generated scramble stored as move indexes, rendered to notation on demand."""
+
+    __slots__ = ("table", "moves")
+
+    def __init__(self, table, moves):
+        self.table = table
+        self.moves = moves
+
+    @property
+    def puzzle_type(self):
+        return self.table.puzzle_type
+
+    def decode(self):
+        """
+        Return the move tuples of every move, (face, layers turned, direction) for
+        the face turning puzzles.
+        """
+        return [self.table.moves[move] for move in self.moves]
+
+    def to_bytes(self):
+        return self.moves.tobytes()
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __eq__(self, other):
+        if not isinstance(other, Scramble):
+            return NotImplemented
+        return self.puzzle_type == other.puzzle_type and self.moves == other.moves
+
+    def __hash__(self):
+        return hash((self.puzzle_type, self.to_bytes()))
+
+    def __str__(self):
+        notation = self.table.notation
+        return " ".join([notation[move] for move in self.moves])
+
+    def __repr__(self):
+        return f"Scramble({self.puzzle_type!r}, {str(self)!r})"
 
 
 class ScrambleGenerator:
-    def __init__(self, puzzle_type="3x3"):
-        self.puzzle_type = puzzle_type
-        self.opposite_moves = {
-            "U ": "U' ",
-            "U' ": "U ",
-            "u ": "u' ",
-            "u' ": "u ",
-            "U2 ": "U2' ",
-            "U2' ": "U2 ",
-            "U3 ": "U3' ",
-            "U3' ": "U3 ",
-            "U4 ": "U4' ",
-            "U4' ": "U4 ",
-            "U5 ": "U5' ",
-            "U5' ": "U5 ",
-            "D ": "D' ",
-            "D' ": "D ",
-            "D2 ": "D2' ",
-            "D2' ": "D2 ",
-            "D3 ": "D3' ",
-            "D3' ": "D3 ",
-            "D4 ": "D4' ",
-            "D4' ": "D4 ",
-            "D5 ": "D5' ",
-            "D5' ": "D5 ",
-            "L ": "L' ",
-            "L' ": "L ",
-            "l ": "l' ",
-            "l' ": "l ",
-            "L2 ": "L2' ",
-            "L2' ": "L2 ",
-            "L3 ": "L3' ",
-            "L3' ": "L3 ",
-            "L4 ": "L4' ",
-            "L4' ": "L4 ",
-            "L5 ": "L5' ",
-            "L5' ": "L5 ",
-            "R ": "R' ",
-            "R' ": "R ",
-            "r ": "r' ",
-            "r' ": "r ",
-            "R2 ": "R2' ",
-            "R2' ": "R2 ",
-            "R3 ": "R3' ",
-            "R3' ": "R3 ",
-            "R4 ": "R4' ",
-            "R4' ": "R4 ",
-            "R5 ": "R4' ",
-            "R5' ": "R4 ",
-            "F ": "F' ",
-            "F' ": "F ",
-            "F2 ": "F2' ",
-            "F2' ": "F2 ",
-            "F3 ": "F3' ",
-            "F3' ": "F3 ",
-            "F4 ": "F4' ",
-            "F4' ": "F4 ",
-            "F5 ": "F5' ",
-            "F5' ": "F5 ",
-            "B ": "B' ",
-            "B' ": "B ",
-            "b ": "b' ",
-            "b' ": "b ",
-            "B2 ": "B2' ",
-            "B2' ": "B2 ",
-            "B3 ": "B3' ",
-            "B3' ": "B3 ",
-            "B4 ": "B4' ",
-            "B4' ": "B4 ",
-            "B5 ": "B5' ",
-            "B5' ": "B5 ",
-        }
-
-    def generate_scramble(self, puzzle_type="3x3", num_moves=25):
-        puzzle_type = puzzle_type
-        moves = self.get_valid_moves(puzzle_type)
-        scramble_order = []
-        counter = 0
-
-        while counter < num_moves:
-            if counter == 0:
-                scramble_order.append(secrets.choice(moves))
-            else:
-                filtered_moves = [
-                    move
-                    for move in moves
-                    if move != self.opposite_moves[scramble_order[-1]]
-                ]
-                scramble_order.append(secrets.choice(filtered_moves))
-
-            counter += 1
-
-        return "".join(map(str, scramble_order))
-
-    def get_valid_moves(self, puzzle_type):
-        match self.puzzle_type:
-            case "2x2":
-                return ["U ", "U' ", "R ", "R' ", "F ", "F' "]
-            case "3x3":
-                return [
-                    "U ",
-                    "U' ",
-                    "D ",
-                    "D' ",
-                    "L ",
-                    "L' ",
-                    "R ",
-                    "R' ",
-                    "F ",
-                    "F' ",
-                    "B ",
-                    "B' ",
-                ]
-            case "4x4":
-                return [
-                    "U ",
-                    "U' ",
-                    "U2 ",
-                    "U2' ",
-                    "D ",
-                    "D' ",
-                    "D2 ",
-                    "D2' ",
-                    "L ",
-                    "L' ",
-                    "L2 ",
-                    "L2' ",
-                    "R ",
-                    "R' ",
-                    "R2 ",
-                    "R2' ",
-                    "F ",
-                    "F' ",
-                    "F2 ",
-                    "F2' ",
-                    "B ",
-                    "B' ",
-                    "B2 ",
-                    "B2' ",
-                ]
-            case "5x5":
-                return [
-                    "U ",
-                    "U' ",
-                    "U2 ",
-                    "U2' ",
-                    "D ",
-                    "D' ",
-                    "D2 ",
-                    "D2' ",
-                    "L ",
-                    "L' ",
-                    "L2 ",
-                    "L2' ",
-                    "R ",
-                    "R' ",
-                    "R2 ",
-                    "R2' ",
-                    "F ",
-                    "F' ",
-                    "F2 ",
-                    "F2' ",
-                    "B ",
-                    "B' ",
-                    "B2 ",
-                    "B2' ",
-                ]
-            case "6x6":
-                return [
-                    "U ",
-                    "U' ",
-                    "U2 ",
-                    "U2' ",
-                    "U3 ",
-                    "U3' ",
-                    "D ",
-                    "D' ",
-                    "D2 ",
-                    "D2' ",
-                    "D3 ",
-                    "D3' ",
-                    "L ",
-                    "L' ",
-                    "L2 ",
-                    "L2' ",
-                    "L3 ",
-                    "L3' ",
-                    "R ",
-                    "R' ",
-                    "R2 ",
-                    "R2' ",
-                    "R3 ",
-                    "R3' ",
-                    "F ",
-                    "F' ",
-                    "F2 ",
-                    "F2' ",
-                    "F3 ",
-                    "F3' ",
-                    "B ",
-                    "B' ",
-                    "B2 ",
-                    "B2' ",
-                    "B3 ",
-                    "B3' ",
-                ]
-            case "7x7":
-                return [
-                    "U ",
-                    "U' ",
-                    "U2 ",
-                    "U2' ",
-                    "U3 ",
-                    "U3' ",
-                    "D ",
-                    "D' ",
-                    "D2 ",
-                    "D2' ",
-                    "D3 ",
-                    "D3' ",
-                    "L ",
-                    "L' ",
-                    "L2 ",
-                    "L2' ",
-                    "L3 ",
-                    "L3' ",
-                    "R ",
-                    "R' ",
-                    "R2 ",
-                    "R2' ",
-                    "R3 ",
-                    "R3' ",
-                    "F ",
-                    "F' ",
-                    "F2 ",
-                    "F2' ",
-                    "F3 ",
-                    "F3' ",
-                    "B ",
-                    "B' ",
-                    "B2 ",
-                    "B2' ",
-                    "B3 ",
-                    "B3' ",
-                ]
-            case "8x8":
-                return [
-                    "U ",
-                    "U' ",
-                    "U2 ",
-                    "U2' ",
-                    "U3 ",
-                    "U3' ",
-                    "U4 ",
-                    "U4' ",
-                    "D ",
-                    "D' ",
-                    "D2 ",
-                    "D2' ",
-                    "D3 ",
-                    "D3' ",
-                    "D4 ",
-                    "D4' ",
-                    "L ",
-                    "L' ",
-                    "L2 ",
-                    "L2' ",
-                    "L3 ",
-                    "L3' ",
-                    "L4 ",
-                    "L4' ",
-                    "R ",
-                    "R' ",
-                    "R2 ",
-                    "R2' ",
-                    "R3 ",
-                    "R3' ",
-                    "R4 ",
-                    "R4' ",
-                    "F ",
-                    "F' ",
-                    "F2 ",
-                    "F2' ",
-                    "F3 ",
-                    "F3' ",
-                    "F4 ",
-                    "F4' ",
-                    "B ",
-                    "B' ",
-                    "B2 ",
-                    "B2' ",
-                    "B3 ",
-                    "B3' ",
-                    "B4 ",
-                    "B4' ",
-                ]
-            case "9x9":
-                return [
-                    "U ",
-                    "U' ",
-                    "U2 ",
-                    "U2' ",
-                    "U3 ",
-                    "U3' ",
-                    "U4 ",
-                    "U4' ",
-                    "D ",
-                    "D' ",
-                    "D2 ",
-                    "D2' ",
-                    "D3 ",
-                    "D3' ",
-                    "D4 ",
-                    "D4' ",
-                    "L ",
-                    "L' ",
-                    "L2 ",
-                    "L2' ",
-                    "L3 ",
-                    "L3' ",
-                    "L4 ",
-                    "L4' ",
-                    "R ",
-                    "R' ",
-                    "R2 ",
-                    "R2' ",
-                    "R3 ",
-                    "R3' ",
-                    "R4 ",
-                    "R4' ",
-                    "F ",
-                    "F' ",
-                    "F2 ",
-                    "F2' ",
-                    "F3 ",
-                    "F3' ",
-                    "F4 ",
-                    "F4' ",
-                    "B ",
-                    "B' ",
-                    "B2 ",
-                    "B2' ",
-                    "B3 ",
-                    "B3' ",
-                    "B4 ",
-                    "B4' ",
-                ]
-            case "10x10":
-                return [
-                    "U ",
-                    "U' ",
-                    "U2 ",
-                    "U2' ",
-                    "U3 ",
-                    "U3' ",
-                    "U4 ",
-                    "U4' ",
-                    "U5 ",
-                    "U5' ",
-                    "D ",
-                    "D' ",
-                    "D2 ",
-                    "D2' ",
-                    "D3 ",
-                    "D3' ",
-                    "D4 ",
-                    "D4' ",
-                    "D5 ",
-                    "D5' ",
-                    "L ",
-                    "L' ",
-                    "L2 ",
-                    "L2' ",
-                    "L3 ",
-                    "L3' ",
-                    "L4 ",
-                    "L4' ",
-                    "L5 ",
-                    "L5' ",
-                    "R ",
-                    "R' ",
-                    "R2 ",
-                    "R2' ",
-                    "R3 ",
-                    "R3' ",
-                    "R4 ",
-                    "R4' ",
-                    "R5 ",
-                    "R5' ",
-                    "F ",
-                    "F' ",
-                    "F2 ",
-                    "F2' ",
-                    "F3 ",
-                    "F3' ",
-                    "F4 ",
-                    "F4' ",
-                    "F5 ",
-                    "F5' ",
-                    "B ",
-                    "B' ",
-                    "B2 ",
-                    "B2' ",
-                    "B3 ",
-                    "B3' ",
-                    "B4 ",
-                    "B4' ",
-                    "B5 ",
-                    "B5' ",
-                ]
-            case "11x11":
-                return [
-                    "U ",
-                    "U' ",
-                    "U2 ",
-                    "U2' ",
-                    "U3 ",
-                    "U3' ",
-                    "U4 ",
-                    "U4' ",
-                    "U5 ",
-                    "U5' ",
-                    "D ",
-                    "D' ",
-                    "D2 ",
-                    "D2' ",
-                    "D3 ",
-                    "D3' ",
-                    "D4 ",
-                    "D4' ",
-                    "D5 ",
-                    "D5' ",
-                    "L ",
-                    "L' ",
-                    "L2 ",
-                    "L2' ",
-                    "L3 ",
-                    "L3' ",
-                    "L4 ",
-                    "L4' ",
-                    "L5 ",
-                    "L5' ",
-                    "R ",
-                    "R' ",
-                    "R2 ",
-                    "R2' ",
-                    "R3 ",
-                    "R3' ",
-                    "R4 ",
-                    "R4' ",
-                    "R5 ",
-                    "R5' ",
-                    "F ",
-                    "F' ",
-                    "F2 ",
-                    "F2' ",
-                    "F3 ",
-                    "F3' ",
-                    "F4 ",
-                    "F4' ",
-                    "F5 ",
-                    "F5' ",
-                    "B ",
-                    "B' ",
-                    "B2 ",
-                    "B2' ",
-                    "B3 ",
-                    "B3' ",
-                    "B4 ",
-                    "B4' ",
-                    "B5 ",
-                    "B5' ",
-                ]
-            case "pyraminx":
-                return [
-                    "U ",
-                    "U' ",
-                    "u ",
-                    "u' ",
-                    "L ",
-                    "L' ",
-                    "l ",
-                    "l' ",
-                    "R ",
-                    "R' ",
-                    "r ",
-                    "r' ",
-                    "B ",
-                    "B' ",
-                    "b ",
-                    "b' ",
-                ]
-            case "skewb":
-                return [
-                    "L ",
-                    "L' ",
-                    "R ",
-                    "R' ",
-                    "F ",
-                    "F' ",
-                    "B ",
-                    "B' ",
-                ]
+    def __init__(
+        self,
+        puzzle_type="3x3",
+        random_source=None,
+        canonical=False,
+        min_quality=None,
+        dedup_index=None,
+    ):
+        self.puzzle_type = puzzle_type.lower()
+        self.move_table = registry.get_move_table(self.puzzle_type)
+        self.random_source = random_source or SystemRandomSource()
+        self.canonical = canonical
+        # * With min_quality set, scrambles scoring under it are regenerated
+        self.quality_filter = (
+            QualityFilter(min_quality) if min_quality is not None else None
+        )
+        # * Every scramble handed out is recorded here and repeats are regenerated
+        self.dedup_index = dedup_index
+        if min_quality is not None or getattr(dedup_index, "key", None) == "state":
+            # * Fails here rather than mid-stream for puzzles without a state model
+            from .puzzle_state import get_model
+
+            get_model(self.move_table)
+        self.missing = 0
+        self.repeats = 0
+        self.chunk_keys = itertools.count()
+
+    def generate_scramble(self, puzzle_type=None, num_moves=25):
+        return str(self.generate_scrambles(puzzle_type, num_moves, 1)[0])
+
+    def generate_scrambles(
+        self, puzzle_type=None, num_moves=25, count=1, workers=None, ordered=True
+    ):
+        if workers is not None and workers > 1:
+            chunks = self.iter_scramble_chunks(
+                puzzle_type, num_moves, count, workers, ordered
+            )
+            return [scramble for chunk in chunks for scramble in chunk]
+
+        return list(self.iter_scrambles(puzzle_type, num_moves, count))
+
+    def iter_scramble_chunks(
+        self, puzzle_type=None, num_moves=25, count=1, workers=None, ordered=True
+    ):
+        """
+        Generate scrambles across worker processes and yield them a chunk at a time.
+
+        Every chunk draws from its own stream spawned from the random source, so
+        seeded generators stay reproducible. With ordered=False chunks are yielded
+        as soon as any worker finishes one.
+        """
+        # * Imported here so plain generation never pays for multiprocessing
+        from concurrent.futures import (
+            FIRST_COMPLETED,
+            ProcessPoolExecutor,
+            as_completed,
+            wait,
+        )
+
+        table = self.get_move_table(puzzle_type)
+        chunk_sizes = [
+            min(CHUNK_SCRAMBLES, count - start)
+            for start in range(0, count, CHUNK_SCRAMBLES)
+        ]
+
+        workers = workers or os.cpu_count() or 1
+        self.missing = 0
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # * Only keep a couple of chunks per worker in flight so results never pile up
+            max_pending = workers * 2
+            pending = deque() if ordered else set()
+
+            for chunk_size in chunk_sizes:
+                future = executor.submit(
+                    generate_packed_chunk,
+                    table.puzzle_type,
+                    num_moves,
+                    chunk_size,
+                    self.random_source.spawn(next(self.chunk_keys)),
+                    self.canonical,
+                    self.get_min_quality(),
+                )
+
+                if ordered:
+                    pending.append(future)
+                    if len(pending) >= max_pending:
+                        yield self.unpack(table, num_moves, pending.popleft().result())
+                else:
+                    pending.add(future)
+                    if len(pending) >= max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield self.unpack(table, num_moves, future.result())
+
+            for future in pending if ordered else as_completed(pending):
+                yield self.unpack(table, num_moves, future.result())
+
+        # * Workers cannot see the dedup index, so repeats they made are topped up here
+        if self.missing:
+            yield list(self.iter_scrambles(table.puzzle_type, num_moves, self.missing))
+
+    def unpack(self, table, num_moves, result):
+        count, packed, checked, rejected = result
+        if self.quality_filter is not None:
+            self.quality_filter.record(checked, rejected)
+
+        scrambles = unpack_chunk(table, num_moves, count, packed)
+        if self.dedup_index is not None:
+            scrambles = list(filter(self.is_new, scrambles))
+            self.missing += count - len(scrambles)
+        return scrambles
+
+    def iter_scrambles(self, puzzle_type=None, num_moves=25, limit=None):
+        scrambles = self.draw_scrambles(puzzle_type, num_moves, limit)
+        if self.quality_filter is not None:
+            scrambles = filter(self.quality_filter.accept, scrambles)
+        if self.dedup_index is not None:
+            scrambles = filter(self.is_new, scrambles)
+        return itertools.islice(scrambles, limit)
+
+    def draw_scrambles(self, puzzle_type=None, num_moves=25, limit=None):
+        table = self.get_move_table(puzzle_type)
+        next_rows, typecode = self.get_next_rows(table), table.typecode
+
+        # * Random values are drawn a chunk of scrambles at a time, so memory stays
+        # * constant however many scrambles are pulled from the stream
+        chunk_scrambles = (
+            CHUNK_SCRAMBLES if limit is None else min(limit, CHUNK_SCRAMBLES)
+        )
+        random_values = self.random_value_stream(
+            num_moves * chunk_scrambles * 2, typecode
+        )
+        if table.transitions is not None:
+            yield from self.draw_state_scrambles(
+                table, next_rows, num_moves, random_values
+            )
+
+        while True:
+            row = table.first_row
+            scramble_order = []
+
+            for _ in range(num_moves):
+                size, bound, choices = row
+                value = next(random_values)
+                while value >= bound:
+                    value = next(random_values)
+                move = choices[value % size]
+                scramble_order.append(move)
+                row = next_rows[move]
+
+            yield Scramble(table, array(typecode, scramble_order))
+
+    def draw_state_scrambles(self, table, next_rows, num_moves, random_values):
+        # * Same draw as above, but which moves are legal follows the puzzle's state
+        transitions, stride = table.transitions, len(table.moves)
+
+        while True:
+            row, state = table.first_row, 0
+            scramble_order = []
+
+            for _ in range(num_moves):
+                size, bound, choices = row
+                value = next(random_values)
+                while value >= bound:
+                    value = next(random_values)
+                move = choices[value % size]
+                scramble_order.append(move)
+                state = transitions[state * stride + move]
+                row = next_rows[state]
+
+            yield Scramble(table, array(table.typecode, scramble_order))
+
+    def generate_move_matrix(self, puzzle_type=None, num_moves=25, count=1):
+        """
+        Return a (count, num_moves) NumPy array of move indexes (requires numpy).
+
+        Every row is drawn at once, then each pass resamples the first move per row
+        that is not allowed after the move before it, or for the first column not
+        allowed to open a scramble, until no row has one left. Only ever touching
+        the first offender keeps rows distributed exactly like iter_scrambles.
+        """
+        numpy = import_numpy()
+        table = self.get_move_table(puzzle_type)
+        if table.transitions is not None:
+            raise ValueError(
+                "The NumPy backend only supports puzzles whose legal moves follow "
+                f"from the last move, not {table.puzzle_type}"
+            )
+        allowed = numpy.zeros((len(table.moves), len(table.moves)), dtype=bool)
+        for move, (_, _, choices) in enumerate(self.get_next_rows(table)):
+            allowed[move, list(choices)] = True
+        # * Megaminx and Clock scrambles have to start at the beginning of the pattern
+        allowed_first = numpy.zeros(len(table.moves), dtype=bool)
+        allowed_first[list(table.first_row[2])] = True
+
+        matrix = self.draw_move_indexes(len(table.moves), (count, num_moves))
+        rows = numpy.arange(count)
+
+        while num_moves:
+            block = matrix[rows]
+            disallowed = numpy.concatenate(
+                (
+                    ~allowed_first[block[:, :1]],
+                    ~allowed[block[:, :-1], block[:, 1:]],
+                ),
+                axis=1,
+            )
+            offending = disallowed.any(axis=1)
+            rows, disallowed = rows[offending], disallowed[offending]
+            if not rows.size:
+                break
+            columns = disallowed.argmax(axis=1)
+            matrix[rows, columns] = self.draw_move_indexes(len(table.moves), rows.size)
+
+        return matrix
+
+    def draw_move_indexes(self, num_choices, shape):
+        # * Same byte rejection as the scalar sampler, but over whole arrays at a time
+        numpy = import_numpy()
+        dtype = numpy.uint8 if num_choices <= 256 else numpy.uint16
+        bound = (256 if dtype is numpy.uint8 else 65536) // num_choices * num_choices
+        needed = int(numpy.prod(shape))
+        drawn = [numpy.empty(0, dtype=dtype)]
+
+        while needed > 0:
+            values = numpy.frombuffer(
+                self.random_source.randbytes(needed * 2 * numpy.dtype(dtype).itemsize),
+                dtype=dtype,
+            )
+            values = values[values < bound][:needed]
+            drawn.append(values % num_choices)
+            needed -= values.size
+
+        return numpy.concatenate(drawn).reshape(shape)
+
+    def scrambles_from_matrix(self, matrix, puzzle_type=None):
+        table = self.get_move_table(puzzle_type)
+        scrambles = []
+
+        for row in matrix:
+            moves = array(table.typecode)
+            moves.frombytes(row.tobytes())
+            scrambles.append(Scramble(table, moves))
+
+        return scrambles
+
+    def get_move_table(self, puzzle_type=None):
+        if puzzle_type is None or puzzle_type.lower() == self.puzzle_type:
+            return self.move_table
+        return registry.get_move_table(puzzle_type)
+
+    def get_next_rows(self, table):
+        return table.canonical_next_rows if self.canonical else table.next_rows
+
+    def random_value_stream(self, chunk_size, typecode="B"):
+        """Yield random bytes, or for tables past 256 moves little-endian 16-bit words."""
+        randbytes = self.random_source.randbytes
+        if typecode == "B":
+            while True:
+                yield from randbytes(chunk_size)
+
+        while True:
+            values = array(typecode, randbytes(chunk_size * 2))
+            # * Seeded streams give the same words on every platform
+            if sys.byteorder == "big":
+                values.byteswap()
+            yield from values
+
+    def is_new(self, scramble):
+        if self.dedup_index.add(scramble):
+            self.repeats = 0
+            return True
+
+        self.repeats += 1
+        if self.repeats >= MAX_REPEATS:
+            raise ScrambleIndexError(
+                f"Gave up after {MAX_REPEATS} repeated scrambles in a row, either the "
+                "seed was used before or the index holds nearly every scramble of "
+                "this length"
+            )
+        return False
+
+    def get_min_quality(self):
+        return self.quality_filter.min_quality if self.quality_filter else None
+
+    def get_quality_stats(self):
+        """Checked, rejected and rejection rate so far, or None without a filter."""
+        return self.quality_filter.get_stats() if self.quality_filter else None
+
+    def get_valid_moves(self, puzzle_type=None):
+        return self.get_move_table(puzzle_type).notation
+
+    def generate_random_state_scramble(self, puzzle_type=None):
+        return str(self.generate_random_state_scrambles(puzzle_type, 1)[0])
+
+    def generate_random_state_scrambles(self, puzzle_type=None, count=1):
+        """
+        Scrambles that leave the 2x2 or 3x3 in a uniformly random state.
+
+        The solver tables are built and cached on disk on first use.
+        """
+        from .random_state import generate_random_state_moves
+
+        table = self.get_move_table(puzzle_type)
+        # * Solver moves are renumbered so each puzzle has one move encoding
+        positions = {notation: index for index, notation in enumerate(table.notation)}
+        scrambles = []
+
+        while len(scrambles) < count:
+            solver_table, moves = generate_random_state_moves(
+                table.puzzle_type, self.random_source
+            )
+            moves = [positions[solver_table.notation[move]] for move in moves]
+            scramble = Scramble(table, array(table.typecode, moves))
+            if self.dedup_index is None or self.is_new(scramble):
+                scrambles.append(scramble)
+
+        return scrambles
+
+
+def import_numpy():
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError(
+            "The NumPy backend needs the optional numpy extra: "
+            "pip install scramble_generator[numpy]"
+        ) from error
+
+    return numpy
+
+
+generators = {}
+
+
+def get_generator(puzzle_type="3x3", canonical=False, min_quality=None):
+    """Return a shared generator with the puzzle's move tables already built."""
+    key = puzzle_type.lower(), canonical, min_quality
+
+    if key not in generators:
+        generators[key] = ScrambleGenerator(
+            puzzle_type, canonical=canonical, min_quality=min_quality
+        )
+
+    return generators[key]
+
+
+def generate_packed_chunk(
+    puzzle_type, num_moves, count, random_source, canonical, min_quality
+):
+    # * Runs in worker processes, only the raw move indexes travel back to the parent
+    generator = ScrambleGenerator(puzzle_type, random_source, canonical, min_quality)
+    scrambles = generator.generate_scrambles(num_moves=num_moves, count=count)
+    stats = generator.get_quality_stats() or {"checked": 0, "rejected": 0}
+    return (
+        count,
+        b"".join([scramble.to_bytes() for scramble in scrambles]),
+        stats["checked"],
+        stats["rejected"],
+    )
+
+
+def unpack_chunk(table, num_moves, count, packed):
+    stride = num_moves * array(table.typecode).itemsize
+    scrambles = []
+
+    for index in range(count):
+        start = index * stride
+        moves = array(table.typecode)
+        moves.frombytes(packed[start : start + stride])
+        scrambles.append(Scramble(table, moves))
+
+    return scrambles
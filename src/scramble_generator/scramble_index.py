@@ -0,0 +1,186 @@
+"""
+Deduplication indexes that remember every scramble issued so far.
+
+Scrambles are keyed by a 128-bit BLAKE2b hash of either their encoded move
+indexes or the sticker state they leave the puzzle in. ExactIndex keeps the
+first 64 bits of every key in a set; BloomIndex keeps a fixed size Bloom filter
+instead. Either can be saved and loaded again so later batches are checked
+against everything issued before. Hash collisions and Bloom false positives only
+ever reject a new scramble, they never let a repeat through.
+"""
+
+import math
+import os
+import struct
+import threading
+from array import array
+from hashlib import blake2b
+
+from .puzzle_state import get_model
+
+MAGIC = b"SGDX"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHBBIQQ")
+INDEX_KINDS = ("exact", "bloom")
+KEY_MODES = ("moves", "state")
+
+
+class ScrambleIndexError(Exception):
+    pass
+
+
+def get_scramble_digest(scramble, key="moves"):
+    if key == "state":
+        model = get_model(scramble.table)
+        data = model.apply_scramble(scramble)
+    else:
+        data = scramble.to_bytes()
+
+    digest = blake2b(digest_size=16)
+    digest.update(scramble.puzzle_type.encode() + b"\0")
+    digest.update(data)
+    return digest.digest()
+
+
+class ScrambleIndex:
+    kind = None
+
+    def __init__(self, key="moves"):
+        if key not in KEY_MODES:
+            raise ValueError(f"Unknown index key: {key}")
+        self.key = key
+        self.count = 0
+
+    def add(self, scramble):
+        """Record a scramble, returning False if it (probably) was issued before."""
+        if not self.add_digest(get_scramble_digest(scramble, self.key)):
+            return False
+        self.count += 1
+        return True
+
+    def __contains__(self, scramble):
+        return self.contains_digest(get_scramble_digest(scramble, self.key))
+
+    def __len__(self):
+        return self.count
+
+    def save(self, path):
+        num_hashes, num_bits, data = self.get_data()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # * Written to a temporary file and swapped in like the table cache
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    FORMAT_VERSION,
+                    INDEX_KINDS.index(self.kind),
+                    KEY_MODES.index(self.key),
+                    num_hashes,
+                    num_bits,
+                    self.count,
+                )
+            )
+            f.write(data)
+        os.replace(temporary_path, path)
+
+
+class ExactIndex(ScrambleIndex):
+    kind = "exact"
+
+    def __init__(self, key="moves"):
+        super().__init__(key)
+        self.hashes = set()
+
+    def contains_digest(self, digest):
+        return int.from_bytes(digest[:8], "little") in self.hashes
+
+    def add_digest(self, digest):
+        value = int.from_bytes(digest[:8], "little")
+        if value in self.hashes:
+            return False
+        self.hashes.add(value)
+        return True
+
+    def get_data(self):
+        return 0, 0, array("Q", sorted(self.hashes)).tobytes()
+
+    def set_data(self, num_hashes, num_bits, data):
+        hashes = array("Q")
+        hashes.frombytes(data)
+        self.hashes = set(hashes)
+
+
+class BloomIndex(ScrambleIndex):
+    kind = "bloom"
+
+    def __init__(self, capacity=10_000_000, error_rate=1e-6, key="moves"):
+        super().__init__(key)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def get_positions(self, digest):
+        # * Double hashing, two 64-bit halves stand in for num_hashes hash functions
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        num_bits = self.num_bits
+        return [(first + i * second) % num_bits for i in range(self.num_hashes)]
+
+    def contains_digest(self, digest):
+        bits = self.bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self.get_positions(digest)
+        )
+
+    def add_digest(self, digest):
+        bits = self.bits
+        is_new = False
+        for position in self.get_positions(digest):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                is_new = True
+        return is_new
+
+    @property
+    def memory_bytes(self):
+        return len(self.bits)
+
+    def get_data(self):
+        return self.num_hashes, self.num_bits, bytes(self.bits)
+
+    def set_data(self, num_hashes, num_bits, data):
+        if len(data) != (num_bits + 7) // 8:
+            raise ScrambleIndexError("Bloom filter file is truncated")
+        self.num_hashes, self.num_bits = num_hashes, num_bits
+        self.bits = bytearray(data)
+        # * Only the filter itself is stored, the sizing it was built for is not
+        self.capacity = self.error_rate = None
+
+
+def load_index(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        data = f.read()
+
+    if len(header) < HEADER.size:
+        raise ScrambleIndexError("Index file is truncated")
+    magic, format_version, kind, key, num_hashes, num_bits, count = HEADER.unpack(
+        header
+    )
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        raise ScrambleIndexError("Not an index file this version can read")
+
+    index_class = ExactIndex if INDEX_KINDS[kind] == "exact" else BloomIndex
+    index = index_class.__new__(index_class)
+    ScrambleIndex.__init__(index, KEY_MODES[key])
+    index.set_data(num_hashes, num_bits, data)
+    index.count = count
+    return index
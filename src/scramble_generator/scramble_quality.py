@@ -0,0 +1,64 @@
+"""
+Quality scoring for generated scrambles.
+
+A scramble's score is the share of stickers its end state moves away from their
+solved colour, so 0.0 is solved and a random 3x3 state sits around 0.75.
+"""
+
+from .puzzle_state import get_model
+
+# * This many rejections in a row means no scramble can reach min_quality
+MAX_REJECTIONS = 10_000
+
+
+class ScrambleQualityError(Exception):
+    pass
+
+
+def score_scramble(scramble):
+    model = get_model(scramble.table)
+    return 1 - model.solved_fraction(model.apply_scramble(scramble))
+
+
+class QualityFilter:
+    """Rejects scrambles scoring under min_quality and keeps count of how many."""
+
+    def __init__(self, min_quality):
+        if not 0 <= min_quality <= 1:
+            raise ValueError(f"min_quality must be between 0 and 1, not {min_quality}")
+        self.min_quality = min_quality
+        self.checked = 0
+        self.rejected = 0
+        self.rejections = 0
+
+    def accept(self, scramble):
+        self.checked += 1
+        if score_scramble(scramble) >= self.min_quality:
+            self.rejections = 0
+            return True
+
+        self.rejected += 1
+        self.rejections += 1
+        if self.rejections >= MAX_REJECTIONS:
+            raise ScrambleQualityError(
+                f"Gave up after {MAX_REJECTIONS} scrambles in a row scored under "
+                f"{self.min_quality}, lower the minimum quality or add moves"
+            )
+        return False
+
+    def record(self, checked, rejected):
+        # * Folds in the counts from filters that ran in worker processes
+        self.checked += checked
+        self.rejected += rejected
+
+    @property
+    def rejection_rate(self):
+        return self.rejected / self.checked if self.checked else 0.0
+
+    def get_stats(self):
+        return {
+            "min_quality": self.min_quality,
+            "checked": self.checked,
+            "rejected": self.rejected,
+            "rejection_rate": self.rejection_rate,
+        }
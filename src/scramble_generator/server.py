@@ -0,0 +1,510 @@
+"""
+Asyncio HTTP and WebSocket service handing out scrambles to timing stations.
+
+Every (puzzle, move count) served gets a ScramblePool, a ring buffer of
+pre-rendered scrambles that a background task tops up through a worker thread,
+so answering a request is popping from a deque rather than generating. Only the
+app's puzzles and the ones pre-warmed at startup are served, and at most
+MAX_POOLS pools are kept.
+
+    GET /puzzles
+    GET /scramble?puzzle=3x3[&moves=25]
+    GET /scrambles?puzzle=3x3&count=50[&moves=25]
+    GET /ws  (WebSocket, send {"puzzle": "3x3", "count": 5}, get /scrambles replies)
+
+Only the standard library is used, so the service runs anywhere the CLI does.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+from .puzzle_registry import registry
+from .scramble_generator import ScrambleGenerator
+from .yaml_file_handler import YamlFileHandler
+
+DEFAULT_PORT = 8765
+POOL_SIZE = 1024
+REFILL_BATCH = 128
+MAX_BATCH = 1000
+# * Pools kept at once, the least recently used one is stopped past this
+MAX_POOLS = 64
+# * Seconds a request waits on an empty pool before giving up
+TAKE_TIMEOUT = 30
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+# * WebSocket opcodes
+TEXT, CLOSE, PING, PONG = 0x1, 0x8, 0x9, 0xA
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ScramblePool:
+    """Ring buffer of rendered scrambles for one puzzle and move count."""
+
+    def __init__(self, generator, num_moves, size=POOL_SIZE):
+        self.generator = generator
+        self.num_moves = num_moves
+        self.size = size
+        self.scrambles = deque(maxlen=size)
+        self.low_water = size // 2
+        self.needs_refill = asyncio.Event()
+        self.refilled = asyncio.Event()
+        self.error = None
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.refill_forever())
+        self.needs_refill.set()
+
+    async def refill_forever(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            await self.needs_refill.wait()
+            self.needs_refill.clear()
+
+            while len(self.scrambles) < self.size:
+                count = min(REFILL_BATCH, self.size - len(self.scrambles))
+                # * Generated and rendered off the event loop, only the deque is shared
+                try:
+                    batch = await loop.run_in_executor(None, self.generate, count)
+                except Exception as error:
+                    # * Waiting callers get the error, the next take tries again
+                    self.error = error
+                    self.refilled.set()
+                    break
+                self.error = None
+                self.scrambles.extend(batch)
+                self.refilled.set()
+
+    def generate(self, count):
+        scrambles = self.generator.generate_scrambles(
+            num_moves=self.num_moves, count=count
+        )
+        return [str(scramble) for scramble in scrambles]
+
+    async def take(self, count=1):
+        taken = []
+
+        while len(taken) < count:
+            if not self.scrambles:
+                self.refilled.clear()
+                self.needs_refill.set()
+                try:
+                    await asyncio.wait_for(self.refilled.wait(), TAKE_TIMEOUT)
+                except asyncio.TimeoutError as error:
+                    raise ServiceError(
+                        503, "Timed out waiting for scrambles"
+                    ) from error
+                if self.error is not None and not self.scrambles:
+                    raise ServiceError(
+                        500, f"Could not generate scrambles: {self.error}"
+                    )
+                continue
+            for _ in range(min(count - len(taken), len(self.scrambles))):
+                taken.append(self.scrambles.popleft())
+
+        if len(self.scrambles) < self.low_water:
+            self.needs_refill.set()
+        return taken
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+
+
+class ScrambleServer:
+    def __init__(self, pool_size=POOL_SIZE):
+        self.config = YamlFileHandler("resources/configs/config.yaml").load_yaml_file()
+        self.pool_size = pool_size
+        self.puzzle_types = {
+            str(puzzle_type).lower() for puzzle_type in self.config["puzzle_type_list"]
+        }
+        self.generators = {}
+        self.pools = {}
+
+    def get_pool(self, puzzle_type, num_moves=None):
+        puzzle_type = puzzle_type.lower()
+        # * Any other NxN would let a client build tables of any size
+        if puzzle_type not in self.puzzle_types:
+            raise ServiceError(404, f"Puzzle not served: {puzzle_type}")
+        if num_moves is None:
+            num_moves = registry.get_default_num_moves(puzzle_type)
+        self.check_num_moves(num_moves)
+
+        key = puzzle_type, num_moves
+        if key in self.pools:
+            # * Reinserted so the dict stays ordered from least to most recently used
+            self.pools[key] = self.pools.pop(key)
+            return self.pools[key]
+
+        if puzzle_type not in self.generators:
+            try:
+                self.generators[puzzle_type] = ScrambleGenerator(puzzle_type)
+            except ValueError as error:
+                raise ServiceError(404, str(error)) from error
+        if len(self.pools) >= MAX_POOLS:
+            self.pools.pop(next(iter(self.pools))).stop()
+        pool = ScramblePool(self.generators[puzzle_type], num_moves, self.pool_size)
+        pool.start()
+        self.pools[key] = pool
+        return pool
+
+    def check_num_moves(self, num_moves):
+        moves_range = self.config["num_moves_range"]
+        if not (
+            is_int(num_moves) and moves_range["min"] <= num_moves <= moves_range["max"]
+        ):
+            raise ServiceError(
+                400,
+                f"moves must be a whole number between {moves_range['min']} "
+                f"and {moves_range['max']}",
+            )
+
+    def prewarm(self, puzzle_types):
+        for puzzle_type in puzzle_types:
+            # * Puzzles the operator names are served on top of the app's own
+            self.puzzle_types.add(puzzle_type.lower())
+            self.get_pool(puzzle_type)
+
+    async def get_scrambles(self, puzzle_type, count=1, num_moves=None):
+        if not is_int(count) or not 1 <= count <= MAX_BATCH:
+            raise ServiceError(
+                400, f"count must be a whole number between 1 and {MAX_BATCH}"
+            )
+
+        pool = self.get_pool(puzzle_type, num_moves)
+        return {
+            "puzzle_type": puzzle_type.lower(),
+            "scrambles": await pool.take(count),
+        }
+
+    async def route(self, method, path, query):
+        if method != "GET":
+            raise ServiceError(405, "Only GET is supported")
+
+        if path == "/puzzles":
+            return {"puzzles": self.config["puzzle_type_list"]}
+        if path in ("/scramble", "/scrambles"):
+            puzzle_type = get_param(query, "puzzle", "3x3")
+            num_moves = get_int_param(query, "moves")
+            count = 1 if path == "/scramble" else get_int_param(query, "count", 1)
+            result = await self.get_scrambles(puzzle_type, count, num_moves)
+            if path == "/scramble":
+                return {
+                    "puzzle_type": result["puzzle_type"],
+                    "scramble": result["scrambles"][0],
+                }
+            return result
+
+        raise ServiceError(404, f"No such endpoint: {path}")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, headers = request
+                url = urlsplit(target)
+
+                upgrade = headers.get("upgrade", "").lower()
+                if url.path == "/ws" and upgrade == "websocket":
+                    await self.serve_websocket(reader, writer, headers)
+                    break
+
+                try:
+                    status, body = 200, await self.route(
+                        method, url.path, parse_qs(url.query)
+                    )
+                except ServiceError as error:
+                    status, body = error.status, {"error": str(error)}
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                write_response(writer, status, body, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, KeyError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_websocket(self, reader, writer, headers):
+        accept = hashlib.sha1(
+            (headers["sec-websocket-key"] + WEBSOCKET_GUID).encode(),
+            usedforsecurity=False,
+        ).digest()
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + base64.b64encode(accept) + b"\r\n\r\n"
+        )
+        await writer.drain()
+
+        while True:
+            opcode, payload = await read_frame(reader)
+            if opcode == CLOSE:
+                writer.write(encode_frame(CLOSE, payload[:2]))
+                await writer.drain()
+                return
+            if opcode == PING:
+                writer.write(encode_frame(PONG, payload))
+            elif opcode == TEXT:
+                writer.write(encode_frame(TEXT, await self.answer_message(payload)))
+            await writer.drain()
+
+    async def answer_message(self, payload):
+        try:
+            message = json.loads(payload)
+            if isinstance(message, str):
+                message = {"puzzle": message}
+            result = await self.get_scrambles(
+                message.get("puzzle", "3x3"),
+                message.get("count", 1),
+                message.get("moves"),
+            )
+        except ServiceError as error:
+            result = {"error": str(error)}
+        except (ValueError, TypeError, AttributeError):
+            result = {"error": 'Messages look like {"puzzle": "3x3", "count": 5}'}
+        return json.dumps(result).encode()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def stop(self):
+        for pool in self.pools.values():
+            pool.stop()
+
+
+def is_int(value):
+    # * JSON numbers can arrive as floats or booleans, neither is a count
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def get_param(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def get_int_param(query, name, default=None):
+    value = get_param(query, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError as error:
+        raise ServiceError(400, f"{name} must be a whole number") from error
+
+
+async def read_request(reader):
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+
+    method, target, _ = request_line.decode("latin-1").split()
+    headers = await read_headers(reader)
+
+    # * Nothing takes a body, but it has to be read to keep the connection usable
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    return method, target, headers
+
+
+async def read_headers(reader):
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+def write_response(writer, status, body, keep_alive=True):
+    payload = json.dumps(body).encode()
+    writer.write(
+        (
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        ).encode()
+        + payload
+    )
+
+
+def mask_payload(payload, mask):
+    repeated = (mask * (len(payload) // 4 + 1))[: len(payload)]
+    masked = int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")
+    return masked.to_bytes(len(payload), "big")
+
+
+async def read_frame(reader):
+    """Read one unfragmented WebSocket frame, returning (opcode, payload)."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = int.from_bytes(await reader.readexactly(2), "big")
+    elif length == 127:
+        length = int.from_bytes(await reader.readexactly(8), "big")
+
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    return first & 0x0F, mask_payload(payload, mask) if mask else payload
+
+
+def encode_frame(opcode, payload, mask=False):
+    # * Clients have to mask what they send, servers must not
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    if len(payload) < 126:
+        header.append(mask_bit | len(payload))
+    elif len(payload) < 65536:
+        header.append(mask_bit | 126)
+        header += len(payload).to_bytes(2, "big")
+    else:
+        header.append(mask_bit | 127)
+        header += len(payload).to_bytes(8, "big")
+
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = mask_payload(payload, key)
+    return bytes(header) + payload
+
+
+class ScrambleClient:
+    """Keep-alive HTTP and WebSocket client for trying out and load testing a server."""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+        self.websocket = False
+
+    async def connect(self, websocket=False):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        if not websocket:
+            return
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write(
+            (
+                f"GET /ws HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+            ).encode()
+        )
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        await read_headers(self.reader)
+        if b" 101 " not in status_line:
+            raise ConnectionError(f"WebSocket upgrade refused: {status_line!r}")
+        self.websocket = True
+
+    async def request(self, path):
+        self.writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n\r\n".encode()
+        )
+        await self.writer.drain()
+        await self.reader.readline()
+        headers = await read_headers(self.reader)
+        body = await self.reader.readexactly(int(headers["content-length"]))
+        return json.loads(body)
+
+    async def send_message(self, message):
+        self.writer.write(encode_frame(TEXT, json.dumps(message).encode(), mask=True))
+        await self.writer.drain()
+        _, payload = await read_frame(self.reader)
+        return json.loads(payload)
+
+    async def get_scrambles(self, puzzle_type="3x3", count=1, num_moves=None):
+        if self.websocket:
+            message = {"puzzle": puzzle_type, "count": count}
+            if num_moves is not None:
+                message["moves"] = num_moves
+            return await self.send_message(message)
+
+        path = f"/scrambles?puzzle={puzzle_type}&count={count}"
+        if num_moves is not None:
+            path += f"&moves={num_moves}"
+        return await self.request(path)
+
+    async def get_scramble(self, puzzle_type="3x3", num_moves=None):
+        result = await self.get_scrambles(puzzle_type, 1, num_moves)
+        return result["scrambles"][0]
+
+    async def close(self):
+        if self.websocket:
+            self.writer.write(encode_frame(CLOSE, b"\x03\xe8", mask=True))
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="scramble-generator-server",
+        description="Serve scrambles over HTTP and WebSocket.",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="address to listen on (use 0.0.0.0 to serve the whole LAN)",
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=POOL_SIZE,
+        help="scrambles kept ready per puzzle",
+    )
+    parser.add_argument(
+        "--puzzles",
+        nargs="*",
+        help="puzzles to pre-warm at startup (defaults to every puzzle in the app)",
+    )
+    return parser.parse_args(argv)
+
+
+async def run(args):
+    server = ScrambleServer(args.pool_size)
+    server.prewarm(
+        args.puzzles if args.puzzles is not None else server.config["puzzle_type_list"]
+    )
+    try:
+        await server.serve(args.host, args.port)
+    finally:
+        server.stop()
+
+
+def main(argv=None):
+    try:
+        asyncio.run(run(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Solve sessions kept in an append-only binary log, with running statistics.
+
+A log file is a small header followed by one record per solve: the solve's
+Unix timestamp and time in milliseconds, then its puzzle type and scramble as
+UTF-8. Records are only ever appended and loading maps the file read-only, so
+opening a session of any size is a single pass with no parsing of old text.
+Only the last record may be cut short, anything else that does not read back as
+a record raises SolveLogError rather than being dropped on the next append.
+"""
+
+import codecs
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from bisect import bisect_left, insort
+from collections import deque
+
+MAGIC = b"SGSL"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sH2x")
+RECORD = struct.Struct("<qIBH")
+AVERAGE_SIZES = (5, 12, 100)
+# * Longer than any puzzle type name, a bigger length field has been damaged
+MAX_PUZZLE_TYPE_SIZE = 32
+
+
+class SolveLogError(Exception):
+    pass
+
+
+def get_session_dir():
+    if os.environ.get("SCRAMBLE_GENERATOR_DATA"):
+        return os.environ["SCRAMBLE_GENERATOR_DATA"]
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA", os.path.expanduser("~"))
+    else:
+        base = os.environ.get("XDG_DATA_HOME", os.path.expanduser("~/.local/share"))
+    return os.path.join(base, "scramble_generator", "sessions")
+
+
+class Solve:
+    __slots__ = ("timestamp", "time_ms", "puzzle_type", "scramble")
+
+    def __init__(self, time_ms, puzzle_type, scramble, timestamp=None):
+        self.timestamp = timestamp if timestamp is not None else time.time_ns() // 10**6
+        self.time_ms = time_ms
+        self.puzzle_type = puzzle_type
+        self.scramble = scramble
+
+    def to_bytes(self):
+        puzzle_type = self.puzzle_type.encode()
+        scramble = self.scramble.encode()
+        return (
+            RECORD.pack(self.timestamp, self.time_ms, len(puzzle_type), len(scramble))
+            + puzzle_type
+            + scramble
+        )
+
+    def __repr__(self):
+        return f"Solve({self.time_ms!r}, {self.puzzle_type!r}, {self.scramble!r})"
+
+
+class RollingAverage:
+    """
+    WCA style average of the last size times, dropping the best and worst 5%.
+
+    The window is kept both in arrival order and sorted, so adding a time costs
+    a bisect and a shift of at most size entries, however long the session is.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.trim = math.ceil(size * 0.05)
+        self.window = deque()
+        self.ordered = []
+        self.total = 0
+        self.current = None
+        self.best = None
+
+    def add(self, time_ms):
+        self.window.append(time_ms)
+        insort(self.ordered, time_ms)
+        self.total += time_ms
+
+        if len(self.window) > self.size:
+            oldest = self.window.popleft()
+            del self.ordered[bisect_left(self.ordered, oldest)]
+            self.total -= oldest
+
+        if len(self.window) == self.size:
+            trimmed = sum(self.ordered[: self.trim]) + sum(self.ordered[-self.trim :])
+            self.current = (self.total - trimmed) / (self.size - 2 * self.trim)
+            if self.best is None or self.current < self.best:
+                self.best = self.current
+
+
+class SessionStats:
+    def __init__(self, average_sizes=AVERAGE_SIZES):
+        self.count = 0
+        self.total = 0
+        self.best = None
+        self.averages = {size: RollingAverage(size) for size in average_sizes}
+
+    def add(self, time_ms):
+        self.count += 1
+        self.total += time_ms
+        if self.best is None or time_ms < self.best:
+            self.best = time_ms
+        for average in self.averages.values():
+            average.add(time_ms)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def get_stats(self):
+        stats = {"count": self.count, "best": self.best, "mean": self.mean}
+        for size, average in self.averages.items():
+            stats[f"ao{size}"] = average.current
+            stats[f"best_ao{size}"] = average.best
+        return stats
+
+
+class SolveSession:
+    """One session's log file plus its statistics, kept up to date as solves come in."""
+
+    def __init__(self, path):
+        self.path = path
+        self.stats = SessionStats()
+        self.count = 0
+        # * Where the last whole record ends, appends start from here
+        self.valid_size = 0
+        for end, solve in self.iter_records():
+            self.stats.add(solve.time_ms)
+            self.count += 1
+            self.valid_size = end
+
+    def iter_solves(self):
+        for _, solve in self.iter_records():
+            yield solve
+
+    def iter_records(self):
+        try:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return
+
+        with mapped:
+            if len(mapped) < HEADER.size:
+                raise SolveLogError(f"{self.path} is truncated")
+            magic, format_version = HEADER.unpack_from(mapped)
+            if magic != MAGIC or format_version != FORMAT_VERSION:
+                raise SolveLogError(
+                    f"{self.path} is not a solve log this version reads"
+                )
+
+            offset = HEADER.size
+            while offset + RECORD.size <= len(mapped):
+                timestamp, time_ms, puzzle_size, scramble_size = RECORD.unpack_from(
+                    mapped, offset
+                )
+                if not 0 < puzzle_size <= MAX_PUZZLE_TYPE_SIZE:
+                    raise SolveLogError(f"{self.path} has a damaged record at {offset}")
+                start = offset + RECORD.size
+                end = start + puzzle_size + scramble_size
+                # * A record cut short by a crash is ignored rather than read, as long
+                # * as what was written of it still reads as text
+                if end > len(mapped):
+                    self.decode_text(mapped[start:], offset, final=False)
+                    break
+                puzzle_type = self.decode_text(
+                    mapped[start : start + puzzle_size], offset
+                )
+                scramble = self.decode_text(mapped[start + puzzle_size : end], offset)
+                yield end, Solve(time_ms, puzzle_type, scramble, timestamp)
+                offset = end
+
+    def decode_text(self, data, offset, final=True):
+        # * A length field pointing into the next record picks up its binary header
+        try:
+            text = codecs.getincrementaldecoder("utf-8")().decode(data, final)
+        except UnicodeDecodeError as error:
+            raise SolveLogError(
+                f"{self.path} has a damaged record at {offset}"
+            ) from error
+        if not text.isprintable():
+            raise SolveLogError(f"{self.path} has a damaged record at {offset}")
+        return text
+
+    def add_solve(self, time_ms, puzzle_type, scramble):
+        solve = Solve(time_ms, puzzle_type, scramble)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        with open(self.path, "ab") as f:
+            # * Drop anything after the last whole record before appending
+            if f.tell() != self.valid_size:
+                f.truncate(self.valid_size)
+            if self.valid_size == 0:
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION))
+                self.valid_size = HEADER.size
+            data = solve.to_bytes()
+            f.write(data)
+            self.valid_size += len(data)
+
+        self.stats.add(time_ms)
+        self.count += 1
+        return solve
+
+    def get_stats(self):
+        return self.stats.get_stats()
+
+    def __len__(self):
+        return self.count
+
+
+def get_session_path(name="default"):
+    return os.path.join(get_session_dir(), f"{name}.sgsl")
+
+
+def open_session(name="default"):
+    return SolveSession(get_session_path(name))
+
+
+def reset_session(name="default"):
+    """Move an unreadable log aside, kept for inspection, and start a new one."""
+    path = get_session_path(name)
+    os.replace(path, f"{path}.{time.strftime('%Y%m%d-%H%M%S')}.damaged")
+    return SolveSession(path)
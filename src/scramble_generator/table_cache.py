@@ -0,0 +1,166 @@
+"""
+On-disk cache for large precomputed tables (move tables, pruning tables).
+
+Every table is a flat array stored behind a small header holding a magic
+number, the file format version, the table's own version, its array typecode,
+its length and a CRC32 of the data. Loading memory-maps the file read-only, so
+a cold start is a file open and every process shares the same pages.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+
+MAGIC = b"SGTB"
+FORMAT_VERSION = 1
+# * Padded to 32 bytes so the data after it stays aligned for any typecode
+HEADER = struct.Struct("<4sHHc7xQQ")
+
+
+class TableCacheError(Exception):
+    pass
+
+
+def get_cache_dir():
+    if os.environ.get("SCRAMBLE_GENERATOR_CACHE"):
+        return os.environ["SCRAMBLE_GENERATOR_CACHE"]
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(base, "scramble_generator")
+
+
+class TableCache:
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.tables = {}
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+        self.executor = None
+
+    def get_path(self, name):
+        return os.path.join(self.cache_dir or get_cache_dir(), f"{name}.bin")
+
+    def get(self, name, version, typecode, build):
+        """Return the table as a read-only memoryview, building it if needed."""
+        key = name, version
+
+        if key not in self.tables:
+            with self.get_lock(key):
+                if key not in self.tables:
+                    table = self.load(name, version, typecode)
+                    if table is None:
+                        table = self.build_table(name, version, typecode, build)
+                    self.tables[key] = table
+
+        return self.tables[key]
+
+    def build_table(self, name, version, typecode, build):
+        data = array(typecode, build())
+        try:
+            self.save(name, version, typecode, data)
+        except OSError:
+            # * An unwritable cache directory only costs a rebuild on the next run
+            return memoryview(data).toreadonly()
+
+        table = self.load(name, version, typecode)
+        return table if table is not None else memoryview(data).toreadonly()
+
+    def prefetch(self, name, version, typecode, build):
+        """Start loading or building a table in a background thread."""
+        return self.submit(self.get, name, version, typecode, build)
+
+    def submit(self, function, *args):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self.locks_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="table-cache"
+                )
+        return self.executor.submit(function, *args)
+
+    def get_lock(self, key):
+        with self.locks_lock:
+            return self.locks.setdefault(key, threading.Lock())
+
+    def load(self, name, version, typecode):
+        """Map a cached table, or return None if it is missing, stale or corrupt."""
+        try:
+            with open(self.get_path(name), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            header = self.read_header(mapped, version, typecode)
+        except TableCacheError:
+            mapped.close()
+            return None
+
+        data = memoryview(mapped)[HEADER.size :]
+        if zlib.crc32(data) != header["checksum"]:
+            data.release()
+            mapped.close()
+            return None
+
+        table = data.cast(typecode)
+        if len(table) != header["length"]:
+            table.release()
+            data.release()
+            mapped.close()
+            return None
+        return table
+
+    @staticmethod
+    def read_header(mapped, version, typecode):
+        if len(mapped) < HEADER.size:
+            raise TableCacheError("Table file is truncated")
+
+        magic, format_version, table_version, stored_typecode, length, checksum = (
+            HEADER.unpack_from(mapped)
+        )
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise TableCacheError("Not a table file this version can read")
+        if table_version != version or stored_typecode.decode() != typecode:
+            raise TableCacheError("Table was built by a different version")
+
+        return {"length": length, "checksum": checksum}
+
+    def save(self, name, version, typecode, values):
+        data = values if isinstance(values, array) else array(typecode, values)
+        path = self.get_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # * Written to a temporary file and swapped in, so readers never see half a table
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self.write(temporary_path, version, typecode, data)
+            os.replace(temporary_path, path)
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+    @staticmethod
+    def write(path, version, typecode, data):
+        with open(path, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    FORMAT_VERSION,
+                    version,
+                    typecode.encode(),
+                    len(data),
+                    zlib.crc32(data),
+                )
+            )
+            data.tofile(f)
+
+
+table_cache = TableCache()
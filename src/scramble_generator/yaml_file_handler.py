@@ -1,18 +1,77 @@
+import hashlib
+import json
 import os
-import yaml
+
+from .table_cache import get_cache_dir
+
+# * Bump when the cached layout changes so old caches are ignored
+CACHE_VERSION = 1
 
 
 class YamlFileHandler:
-    def __init__(self, filename):
+    def __init__(self, filename, use_cache=True):
         self.filename = filename
+        self.use_cache = use_cache
 
     def load_yaml_file(self):
-        with open(self.get_file_path(), "r") as f:
-            return yaml.safe_load(f)
+        """
+        Return the parsed file, from a JSON copy in the cache directory when one
+        was written for the file's current mtime and size.
+        """
+        path = self.get_file_path()
+        if not self.use_cache:
+            return self.parse_yaml_file(path)
+
+        stat = os.stat(path)
+        key = [CACHE_VERSION, path, stat.st_mtime_ns, stat.st_size]
+        cache_path = self.get_cache_path(path)
+
+        try:
+            with open(cache_path, "r") as f:
+                cached = json.load(f)
+            if cached["key"] == key:
+                return cached["data"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        data = self.parse_yaml_file(path)
+        self.save_cache(cache_path, key, data)
+        return data
+
+    def parse_yaml_file(self, path):
+        # * PyYAML is only imported once a file actually has to be parsed
+        import yaml
+
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        with open(path, "r") as f:
+            return yaml.load(f, Loader=loader)
+
+    def save_cache(self, cache_path, key, data):
+        encoded = json.dumps({"key": key, "data": data})
+        # * Anything JSON cannot round-trip (non-string keys, tuples) stays uncached
+        if json.loads(encoded)["data"] != data:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temporary_path, "w") as f:
+                f.write(encoded)
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            pass
 
     def save_yaml_file(self, configs):
+        import yaml
+
         with open(self.get_file_path(), "w") as f:
             return yaml.safe_dump(configs, f, default_flow_style=False)
 
     def get_file_path(self):
         return os.path.join(os.path.dirname(__file__), self.filename)
+
+    @staticmethod
+    def get_cache_path(path):
+        digest = hashlib.blake2b(path.encode(), digest_size=8).hexdigest()
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(get_cache_dir(), "configs", f"{name}-{digest}.json")